@@ -3,15 +3,15 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from dataclasses import replace
 from core.database import get_db
 from models.document import Document, ProcessingStatus
 from models.message import Message
 from models.thread import Thread
-from services.document_processing.retrieval import RetrievalService, RetrievalConfig
+from services.document_processing.retrieval import RetrievalService
 from services.document_processing.embedding.vector_storage_service import VectorStorageService
 from services.document_processing.search_engine.elasticsearch_service import ElasticsearchService
 import logging
-import asyncio
 import uuid
 from fastapi.responses import StreamingResponse
 
@@ -179,22 +179,14 @@ async def ask_question(
         doc_ids = [str(doc.id) for doc in documents]
         logger.info(f"Found {len(documents)} ready documents for thread {thread_id}: {doc_ids}")
         
-        assistant_response = ""
-        
         async def generate_stream():
-            nonlocal assistant_response
             try:
-                processed_query = retrieval_service.query_processor.process_query(query)
-                
-                search_results = await retrieval_service._hybrid_search(processed_query, doc_ids)
-                logger.info(f"Retrieved {len(search_results)} search results for query: {query}")
-                
-                async for chunk in retrieval_service._generate_answer(processed_query, search_results):
-                    if chunk:
-                        assistant_response += chunk
-                        yield chunk
-                        await asyncio.sleep(0)
+                response_parts = []
+                async for chunk in retrieval_service.retrieve_answer_stream(query, doc_ids):
+                    response_parts.append(chunk)
+                    yield chunk
                 
+                assistant_response = "".join(response_parts)
                 if assistant_response:
                     assistant_message = Message(
                         id=str(uuid.uuid4()),
@@ -235,6 +227,7 @@ async def update_retrieval_config(
     keyword_weight: float = Query(0.4, description="Weight for keyword search (0.0-1.0)"),
     max_results: int = Query(20, description="Maximum results to return"),
     enable_reranking: bool = Query(True, description="Enable reciprocal rank fusion"),
+    enable_response_cache: Optional[bool] = Query(None, description="Serve repeated questions from the semantic answer cache; unchanged if omitted"),
     retrieval_service: RetrievalService = Depends(get_retrieval_service)
 ):
     try:
@@ -244,11 +237,16 @@ async def update_retrieval_config(
                 detail="Vector weight and keyword weight must sum to 1.0"
             )
         
-        config = RetrievalConfig(
+        if enable_response_cache is None:
+            enable_response_cache = retrieval_service.config.enable_response_cache
+        
+        config = replace(
+            retrieval_service.config,
             vector_weight=vector_weight,
             keyword_weight=keyword_weight,
             max_search_results=max_results,
-            enable_reranking=enable_reranking
+            enable_reranking=enable_reranking,
+            enable_response_cache=enable_response_cache
         )
         
         retrieval_service.update_config(config)
@@ -262,10 +260,18 @@ async def update_retrieval_config(
                 "vector_weight": vector_weight,
                 "keyword_weight": keyword_weight,
                 "max_results": max_results,
-                "enable_reranking": enable_reranking
+                "enable_reranking": enable_reranking,
+                "enable_response_cache": enable_response_cache
             }
         }
         
     except Exception as e:
         logger.error(f"Failed to update retrieval config: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Config update failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Config update failed: {str(e)}")
+
+@router.get("/cache/stats")
+async def get_cache_stats(retrieval_service: RetrievalService = Depends(get_retrieval_service)):
+    return {
+        "response_cache": retrieval_service.response_cache.get_stats(),
+        "coalesced_requests": retrieval_service.coalesced_requests
+    }
@@ -73,10 +73,7 @@ async def delete_thread(thread_id: str, user_id: str = Query(...), db: Session =
 @router.post("/{thread_id}/auto-name")
 async def auto_name_thread(thread_id: str, user_id: str = Query(...), db: Session = Depends(get_db)):
     from models.document import Document
-    from services.document_processing.retrieval.retrieval_service import RetrievalService
-    from services.document_processing.embedding.vector_storage_service import VectorStorageService
-    from services.document_processing.search_engine.elasticsearch_service import ElasticsearchService
-    import openai
+    from api.routers.query import get_retrieval_service
     
     thread = db.query(Thread).filter(
         Thread.id == thread_id,
@@ -95,9 +92,7 @@ async def auto_name_thread(thread_id: str, user_id: str = Query(...), db: Sessio
         raise HTTPException(status_code=400, detail="No ready documents found for this thread")
     
     try:
-        vector_service = VectorStorageService()
-        es_service = ElasticsearchService()
-        retrieval_service = RetrievalService(vector_service, es_service)
+        retrieval_service = await get_retrieval_service()
         
         doc_ids = [str(doc.id) for doc in documents]
         sample_query = retrieval_service.query_processor.process_query("What is this document about?")
@@ -109,8 +104,8 @@ async def auto_name_thread(thread_id: str, user_id: str = Query(...), db: Sessio
         
         doc_names = [doc.filename for doc in documents]
         
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
+        # Reuse the retrieval service's client instead of opening a connection pool per request
+        response = await retrieval_service.openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {
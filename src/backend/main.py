@@ -22,6 +22,7 @@ async def lifespan(app: FastAPI):
     try:
         from services.document_processing.embedding.vector_storage_service import VectorStorageService
         from services.document_processing.search_engine.elasticsearch_service import ElasticsearchService
+        from services.document_processing.retrieval import RetrievalConfig, preload_token_encoder
         
         try:
             _services["vector_storage"] = VectorStorageService()
@@ -37,6 +38,9 @@ async def lifespan(app: FastAPI):
             logger.warning(f"⚠️ ElasticsearchService not available: {e}")
             _services["elasticsearch"] = None
         
+        if await preload_token_encoder(RetrievalConfig().openai_model):
+            logger.info("✅ Token encoder loaded")
+        
         logger.info("✅ Application startup completed")
         
         yield
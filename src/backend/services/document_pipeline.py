@@ -22,6 +22,7 @@ class PipelineConfig:
     enable_metadata: bool = True
     enable_elasticsearch: bool = True
     batch_size: int = 50
+    max_concurrent_documents: int = 4
 
 
 class DocumentPipeline:
@@ -81,7 +82,7 @@ class DocumentPipeline:
             
             try:
                 if self.elasticsearch:
-                    embedding_storage_task = self._embed_and_store(chunks)
+                    embedding_storage_task = self._embed_and_store(chunks, document_id)
                     elasticsearch_task = self.elasticsearch.index_chunks(chunks)
                     
                     embedding_result, elasticsearch_success = await asyncio.gather(
@@ -106,7 +107,7 @@ class DocumentPipeline:
                         self.logger.warning(f"Elasticsearch indexing failed for document {document_id}, but continuing")
                         
                 else:
-                    embedding_result = await self._embed_and_store(chunks)
+                    embedding_result = await self._embed_and_store(chunks, document_id)
                     if not embedding_result:
                         doc_model.processing_status = ProcessingStatus.FAILED
                         db.commit()
@@ -138,8 +139,10 @@ class DocumentPipeline:
         finally:
             db.close()
     
-    async def _embed_and_store(self, chunks: List[Dict[str, Any]]) -> bool:
+    async def _embed_and_store(self, chunks: List[Dict[str, Any]], document_id: Optional[str] = None) -> bool:
         """Helper method to embed chunks and store them in vector database using LangChain"""
+        store_task = None
+        stored = False
         try:
             document_chunks = []
             for chunk_dict in chunks:
@@ -148,23 +151,40 @@ class DocumentPipeline:
                 else:
                     document_chunks.append(chunk_dict)
             
-            embedded_chunks = await self.embedding_service.embed_chunks(document_chunks)
-            if not embedded_chunks:
+            if not document_chunks:
                 return False
             
-            return await self.vector_storage.store_embeddings(embedded_chunks)
+            async for embedded_batch in self.embedding_service.iter_embedded_chunks(
+                document_chunks, self.config.batch_size
+            ):
+                if store_task and not await store_task:
+                    return False
+                store_task = asyncio.create_task(self.vector_storage.store_embeddings(embedded_batch))
+            
+            stored = await store_task
+            return stored
         except Exception as e:
             self.logger.error(f"Embedding/storage error: {str(e)}")
             return False
+        finally:
+            if store_task and not store_task.done():
+                store_task.cancel()
+                await asyncio.gather(store_task, return_exceptions=True)
+            # Don't leave a partial set of vectors behind for a document that will be marked FAILED
+            if store_task and not stored and document_id:
+                await self.vector_storage.delete_document(document_id)
     
     async def process_documents(self, 
             documents: List[Dict[str, Any]],
             strategy: Optional[ChunkingStrategy] = None) -> Dict[str, Any]:
         
-        results = []
-        for document in documents:
-            result = await self.process_document(document, strategy)
-            results.append(result)
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_documents)
+        
+        async def process_bounded(document: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_document(document, strategy)
+        
+        results = await asyncio.gather(*(process_bounded(document) for document in documents))
         
         successful = sum(1 for r in results if r.get("success", False))
         total_chunks = sum(r.get("chunks_processed", 0) for r in results)
@@ -190,7 +210,8 @@ class DocumentPipeline:
                 query_embedding=query_embedding,
                 n_results=n_results,
                 document_id=document_id,
-                filters=filters
+                filters=filters,
+                include=["documents", "metadatas"]
             )
             
             return results
@@ -205,7 +226,8 @@ class DocumentPipeline:
             chunks = await self.vector_storage.search_similar(
                 query_embedding=[0.0] * self.embedding_service.get_embedding_dimension(),
                 document_id=document_id,
-                n_results=1000
+                n_results=1000,
+                include=["metadatas"]
             )
             
             if not chunks:
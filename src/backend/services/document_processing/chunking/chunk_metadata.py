@@ -3,10 +3,28 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 import json
 import hashlib
+import re
 
 from .base import DocumentChunk
 
 
+DATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
+        r'\b\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{2,4}\b',
+        r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{2,4}\b'
+    )
+]
+
+AMOUNT_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'\$[\d,]+(?:\.\d{2})?',
+        r'(?:\d{1,3}(?:,\d{3})*|\d+)(?:\.\d{2})?\s*(?:dollars?|USD|cents?)',
+        r'(?:\d{1,3}(?:,\d{3})*|\d+)\s*(?:million|billion|thousand)',
+    )
+]
+
+
 @dataclass
 class ChunkMetadata:
     document_id: str
@@ -97,30 +115,10 @@ class ChunkMetadataManager:
         return hashlib.md5(content.encode('utf-8')).hexdigest()
     
     def _contains_dates(self, content: str) -> bool:
-        import re
-        date_patterns = [
-            r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
-            r'\b\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{2,4}\b',
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{2,4}\b'
-        ]
-        
-        for pattern in date_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
-        return False
+        return any(pattern.search(content) for pattern in DATE_PATTERNS)
     
     def _contains_amounts(self, content: str) -> bool:
-        import re
-        amount_patterns = [
-            r'\$[\d,]+(?:\.\d{2})?',
-            r'(?:\d{1,3}(?:,\d{3})*|\d+)(?:\.\d{2})?\s*(?:dollars?|USD|cents?)',
-            r'(?:\d{1,3}(?:,\d{3})*|\d+)\s*(?:million|billion|thousand)',
-        ]
-        
-        for pattern in amount_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
-        return False
+        return any(pattern.search(content) for pattern in AMOUNT_PATTERNS)
     
     def _calculate_legal_complexity(self, legal_context: Dict[str, Any]) -> float:
         score = (len(legal_context.get("definitions", [])) * 0.3 + 
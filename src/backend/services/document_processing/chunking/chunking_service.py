@@ -1,4 +1,5 @@
 from typing import Dict, List, Optional, Any, Union
+import re
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import logging
@@ -10,6 +11,18 @@ from .overlap_manager import OverlapManager, OverlapConfig
 from .chunk_metadata import ChunkMetadataManager
 
 
+LEGAL_INDICATORS = [
+    "whereas", "therefore", "party", "parties", "agreement", "contract",
+    "section", "article", "clause", "provision", "shall", "hereby",
+    "terms and conditions", "legal", "law", "court", "jurisdiction"
+]
+
+LEGAL_INDICATOR_PATTERN = re.compile(
+    "|".join(re.escape(indicator) for indicator in LEGAL_INDICATORS),
+    re.IGNORECASE
+)
+
+
 class DocumentChunkingService:
     def __init__(self, 
                  chunk_config: Optional[ChunkConfig] = None,
@@ -104,21 +117,27 @@ class DocumentChunkingService:
         if not chunks:
             return {}
         
-        chunk_lengths = [len(chunk.content) for chunk in chunks]
-        chunk_types = [chunk.metadata.get("chunk_type", "unknown") for chunk in chunks]
-        
         type_counts = {}
-        for chunk_type in chunk_types:
+        legal_chunks = []
+        total_length = 0
+        min_length = float("inf")
+        max_length = 0
+        for chunk in chunks:
+            length = len(chunk.content)
+            total_length += length
+            min_length = min(min_length, length)
+            max_length = max(max_length, length)
+            chunk_type = chunk.metadata.get("chunk_type", "unknown")
             type_counts[chunk_type] = type_counts.get(chunk_type, 0) + 1
-        
-        legal_chunks = [chunk for chunk in chunks if chunk.legal_context]
+            if chunk.legal_context:
+                legal_chunks.append(chunk)
         
         stats = {
             "total_chunks": len(chunks),
-            "avg_chunk_length": sum(chunk_lengths) / len(chunk_lengths),
-            "min_chunk_length": min(chunk_lengths),
-            "max_chunk_length": max(chunk_lengths),
-            "total_content_length": sum(chunk_lengths),
+            "avg_chunk_length": total_length / len(chunks),
+            "min_chunk_length": min_length,
+            "max_chunk_length": max_length,
+            "total_content_length": total_length,
             "chunk_type_distribution": type_counts,
             "legal_chunks_count": len(legal_chunks),
             "legal_chunks_percentage": len(legal_chunks) / len(chunks) * 100
@@ -162,26 +181,25 @@ class DocumentChunkingService:
         chunk_size = max(500, min(4000, estimated_size))
         chunk_overlap = min(chunk_size // 5, 400)
         
+        is_legal = self._is_legal_text(sample_text)
+        
         return ChunkConfig(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            strategy=ChunkingStrategy.LEGAL if self._is_legal_text(sample_text) else ChunkingStrategy.SEMANTIC,
-            preserve_legal_structure=self._is_legal_text(sample_text),
+            strategy=ChunkingStrategy.LEGAL if is_legal else ChunkingStrategy.SEMANTIC,
+            preserve_legal_structure=is_legal,
             min_chunk_size=100,
             max_chunk_size=chunk_size * 2
         )
     
     def _is_legal_text(self, text: str) -> bool:
-        legal_indicators = [
-            "whereas", "therefore", "party", "parties", "agreement", "contract",
-            "section", "article", "clause", "provision", "shall", "hereby",
-            "terms and conditions", "legal", "law", "court", "jurisdiction"
-        ]
-        
-        text_lower = text.lower()
-        legal_word_count = sum(1 for indicator in legal_indicators if indicator in text_lower)
+        found_indicators = set()
+        for match in LEGAL_INDICATOR_PATTERN.finditer(text):
+            found_indicators.add(match.group(0).lower())
+            if len(found_indicators) >= 3:
+                return True
         
-        return legal_word_count >= 3
+        return False
     
     def get_chunk_by_id(self, chunk_id: str) -> Optional[DocumentChunk]:
         metadata = self.metadata_manager.get_metadata(chunk_id)
@@ -6,6 +6,12 @@ import re
 from .base import ChunkingService, ChunkConfig, DocumentChunk
 
 
+DEFINITION_PATTERN = re.compile(r'"([^"]+)" means', re.IGNORECASE)
+OBLIGATION_PATTERN = re.compile(r'\b(?:shall|must|will|agree to)\b', re.IGNORECASE)
+PARTY_PATTERN = re.compile(r'\b(?:Company|Corporation|Licensor|Licensee)\b', re.IGNORECASE)
+REFERENCE_PATTERN = re.compile(r'(?:Section|Article)\s+\d+', re.IGNORECASE)
+
+
 class LegalChunker(ChunkingService):
     def __init__(self, config: ChunkConfig):
         super().__init__(config)
@@ -91,7 +97,7 @@ class LegalChunker(ChunkingService):
                 chunks.extend(section_chunks)
             else:
                 chunk = DocumentChunk(
-                    id=str(uuid.uuid4()),
+                    id=uuid.uuid4().hex,
                     content=section_content,
                     metadata={
                         **metadata,
@@ -137,7 +143,7 @@ class LegalChunker(ChunkingService):
         current_position = 0
         for i, chunk_text in enumerate(chunk_texts):
             chunk = DocumentChunk(
-                id=str(uuid.uuid4()),
+                id=uuid.uuid4().hex,
                 content=chunk_text,
                 metadata={
                     **metadata,
@@ -168,7 +174,7 @@ class LegalChunker(ChunkingService):
                 start_pos = current_position
             
             chunk = DocumentChunk(
-                id=str(uuid.uuid4()),
+                id=uuid.uuid4().hex,
                 content=chunk_text,
                 metadata={
                     **metadata,
@@ -191,23 +197,25 @@ class LegalChunker(ChunkingService):
             chunk.legal_context = legal_context
             
             if legal_context:
+                definition_count = len(legal_context["definitions"])
+                party_count = len(legal_context["parties"])
                 chunk.metadata.update({
-                    "contains_definitions": len(legal_context.get("definitions", [])) > 0,
-                    "contains_obligations": len(legal_context.get("obligations", [])) > 0,
-                    "contains_parties": len(legal_context.get("parties", [])) > 0,
-                    "definition_count": len(legal_context.get("definitions", [])),
-                    "obligation_count": len(legal_context.get("obligations", [])),
-                    "party_count": len(legal_context.get("parties", []))
+                    "contains_definitions": definition_count > 0,
+                    "contains_obligations": legal_context["obligations"],
+                    "contains_parties": party_count > 0,
+                    "definition_count": definition_count,
+                    "obligation_count": int(legal_context["obligations"]),
+                    "party_count": party_count
                 })
         
         return chunks
     
     def _extract_legal_context(self, chunk_text: str, full_text: str) -> Dict[str, Any]:
         context = {
-            "definitions": re.findall(r'"([^"]+)" means', chunk_text, re.IGNORECASE),
-            "obligations": bool(re.search(r'\b(?:shall|must|will|agree to)\b', chunk_text, re.IGNORECASE)),
-            "parties": re.findall(r'\b(?:Company|Corporation|Licensor|Licensee)\b', chunk_text, re.IGNORECASE),
-            "references": re.findall(r'(?:Section|Article)\s+\d+', chunk_text, re.IGNORECASE)
+            "definitions": DEFINITION_PATTERN.findall(chunk_text),
+            "obligations": OBLIGATION_PATTERN.search(chunk_text) is not None,
+            "parties": PARTY_PATTERN.findall(chunk_text),
+            "references": REFERENCE_PATTERN.findall(chunk_text)
         }
         return context
     
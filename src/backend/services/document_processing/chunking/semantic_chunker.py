@@ -48,7 +48,7 @@ class SemanticChunker(ChunkingService):
                 start_pos = current_position
             
             chunk = DocumentChunk(
-                id=str(uuid.uuid4()),
+                id=uuid.uuid4().hex,
                 content=chunk_text,
                 metadata={
                     **metadata,
@@ -76,7 +76,7 @@ class SemanticChunker(ChunkingService):
                 start_pos = current_position
             
             chunk = DocumentChunk(
-                id=str(uuid.uuid4()),
+                id=uuid.uuid4().hex,
                 content=chunk_text,
                 metadata={
                     **metadata,
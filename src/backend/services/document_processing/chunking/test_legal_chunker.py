@@ -0,0 +1,25 @@
+from services.document_processing.chunking.base import ChunkConfig, ChunkingStrategy
+from services.document_processing.chunking.legal_chunker import LegalChunker
+
+
+SAMPLE_TEXT = """ARTICLE 1
+"Software" means the licensed program. Licensee shall pay the Company.
+
+ARTICLE 2
+This clause is informational only."""
+
+
+def test_chunk_text_records_legal_context_metadata():
+    chunker = LegalChunker(ChunkConfig(
+        strategy=ChunkingStrategy.LEGAL, chunk_size=200, chunk_overlap=0, min_chunk_size=10
+    ))
+    
+    first, second = chunker.chunk_text(SAMPLE_TEXT, "doc")
+    
+    assert first.metadata["contains_definitions"] is True
+    assert first.metadata["definition_count"] == 1
+    assert first.metadata["contains_obligations"] is True
+    assert first.metadata["obligation_count"] == 1
+    assert first.metadata["party_count"] == 2
+    assert second.metadata["contains_obligations"] is False
+    assert second.metadata["obligation_count"] == 0
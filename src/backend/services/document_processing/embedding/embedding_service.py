@@ -1,13 +1,13 @@
-import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import functools
+from typing import List, Dict, Any, Optional, AsyncIterator
 from dataclasses import dataclass
 from langchain_openai import OpenAIEmbeddings
 
 from ..chunking.base import DocumentChunk
 
 
-@dataclass
+@dataclass(frozen=True)
 class EmbeddingConfig:
     model: str = "text-embedding-3-small"
     dimensions: Optional[int] = None
@@ -16,25 +16,32 @@ class EmbeddingConfig:
     retry_delay: float = 1.0
 
 
+@functools.lru_cache(maxsize=None)
+def get_shared_embeddings(api_key: Optional[str] = None,
+                          config: Optional[EmbeddingConfig] = None) -> OpenAIEmbeddings:
+    """Return one OpenAIEmbeddings client per key and config so HTTP connections are pooled"""
+    config = config or EmbeddingConfig()
+    kwargs = {"openai_api_key": api_key} if api_key else {}
+    return OpenAIEmbeddings(
+        model=config.model,
+        dimensions=config.dimensions,
+        chunk_size=config.batch_size,
+        max_retries=config.max_retries,
+        **kwargs
+    )
+
+
 class EmbeddingService:
     def __init__(self, api_key: str, config: Optional[EmbeddingConfig] = None):
         self.config = config or EmbeddingConfig()
         self.logger = logging.getLogger(__name__)
         
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=api_key,
-            model=self.config.model,
-            dimensions=self.config.dimensions,
-            chunk_size=self.config.batch_size,
-            max_retries=self.config.max_retries
-        )
+        self.embeddings = get_shared_embeddings(api_key, self.config)
     
     async def embed_text(self, text: str) -> List[float]:
         """Embed a single text using LangChain OpenAI embeddings"""
         try:
-            loop = asyncio.get_event_loop()
-            embedding = await loop.run_in_executor(None, self.embeddings.embed_query, text)
-            return embedding
+            return await self.embeddings.aembed_query(text)
         except Exception as e:
             self.logger.error(f"Failed to embed text: {str(e)}")
             raise
@@ -45,9 +52,7 @@ class EmbeddingService:
             return []
         
         try:
-            loop = asyncio.get_event_loop()
-            embeddings = await loop.run_in_executor(None, self.embeddings.embed_documents, texts)
-            return embeddings
+            return await self.embeddings.aembed_documents(texts)
         except Exception as e:
             self.logger.error(f"Failed to embed texts: {str(e)}")
             raise
@@ -73,6 +78,14 @@ class EmbeddingService:
         
         return embedded_chunks
     
+    async def iter_embedded_chunks(self, 
+                                   chunks: List[DocumentChunk], 
+                                   batch_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Embed chunks batch by batch, yielding each embedded batch as soon as it is ready"""
+        batch_size = batch_size or self.config.batch_size
+        for start in range(0, len(chunks), batch_size):
+            yield await self.embed_chunks(chunks[start:start + batch_size])
+    
     async def embed_query(self, query: str) -> List[float]:
         """Embed a query text"""
         return await self.embed_text(query)
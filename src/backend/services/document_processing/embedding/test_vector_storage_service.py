@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import threading
+
+from services.document_processing.embedding.vector_storage_service import (
+    VectorStorageConfig, VectorStorageService
+)
+
+
+class FakeVectorStore:
+    def __init__(self, metadatas):
+        self.metadatas = metadatas
+        self.offsets = []
+    
+    def get(self, include, limit, offset):
+        self.offsets.append(offset)
+        return {"metadatas": self.metadatas[offset:offset + limit]}
+
+
+class FakeCollection:
+    def __init__(self):
+        self.threads = []
+    
+    def query(self, query_embeddings, n_results, where, include):
+        self.threads.append(threading.get_ident())
+        return {"ids": [["a"]], "distances": [[0.25]], "documents": [["text"]], "metadatas": [[{}]]}
+    
+    def count(self):
+        self.threads.append(threading.get_ident())
+        return 1
+
+
+def make_storage(vectorstore, **config):
+    # Skip __init__ so tests need no ChromaDB server
+    storage = VectorStorageService.__new__(VectorStorageService)
+    storage.config = VectorStorageConfig(**config)
+    storage.logger = logging.getLogger(__name__)
+    storage.vectorstore = vectorstore
+    return storage
+
+
+def test_list_documents_pages_through_chunk_metadata():
+    vectorstore = FakeVectorStore([
+        {"document_id": "a"}, {"document_id": "a"}, {"document_id": "b"},
+        None, {"document_id": "c"}
+    ])
+    storage = make_storage(vectorstore, list_page_size=2)
+    
+    assert sorted(asyncio.run(storage.list_documents())) == ["a", "b", "c"]
+    assert vectorstore.offsets == [0, 2, 4]
+
+
+def test_list_documents_stops_after_an_empty_final_page():
+    vectorstore = FakeVectorStore([{"document_id": "a"}, {"document_id": "b"}])
+    storage = make_storage(vectorstore, list_page_size=2)
+    
+    assert sorted(asyncio.run(storage.list_documents())) == ["a", "b"]
+    assert vectorstore.offsets == [0, 2]
+
+
+def test_chroma_calls_run_off_the_event_loop():
+    collection = FakeCollection()
+    vectorstore = FakeVectorStore([])
+    vectorstore._collection = collection
+    storage = make_storage(vectorstore)
+    
+    async def scenario():
+        results = await storage.search_similar([0.1, 0.2], include=["documents"])
+        stats = await storage.get_collection_stats()
+        return results, stats
+    
+    results, stats = asyncio.run(scenario())
+    
+    assert results[0]["content"] == "text"
+    assert results[0]["similarity"] == 0.75
+    assert stats["total_chunks"] == 1
+    assert threading.get_ident() not in collection.threads
@@ -1,13 +1,14 @@
 import os
+import json
 import logging
 import asyncio
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
+import numpy as np
 import chromadb
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.documents import Document
 
+from .embedding_service import get_shared_embeddings
 from ..chunking.base import DocumentChunk
 
 
@@ -18,6 +19,10 @@ class VectorStorageConfig:
     collection_name: str = "legal_documents"
     distance_metric: str = "cosine"
     max_results: int = 50
+    list_page_size: int = 5000
+    hnsw_m: int = 32
+    hnsw_construction_ef: int = 200
+    hnsw_search_ef: int = 64
 
 
 class VectorStorageService:
@@ -31,25 +36,33 @@ class VectorStorageService:
         )
         
         if embedding_function is None:
-            embedding_function = OpenAIEmbeddings()
+            embedding_function = get_shared_embeddings()
         
         self.vectorstore = Chroma(
             client=self.chroma_client,
             collection_name=self.config.collection_name,
             embedding_function=embedding_function,
-            collection_metadata={"hnsw:space": self.config.distance_metric}
+            collection_metadata={
+                "hnsw:space": self.config.distance_metric,
+                "hnsw:M": self.config.hnsw_m,
+                "hnsw:construction_ef": self.config.hnsw_construction_ef,
+                "hnsw:search_ef": self.config.hnsw_search_ef
+            }
         )
         
         self.logger.info(f"Connected to self-hosted ChromaDB at {self.config.host}:{self.config.port}")
 
     async def store_embeddings(self, embedded_chunks: List[Dict[str, Any]]) -> bool:
-        """Store embeddings using LangChain Chroma"""
+        """Store precomputed embeddings directly in the Chroma collection"""
         try:
-            documents = []
             ids = []
+            embeddings = []
+            metadatas = []
+            documents = []
             
             for item in embedded_chunks:
                 chunk = item["chunk"]
+                legal_context = chunk.legal_context
                 
                 doc_metadata = {
                     "document_id": chunk.document_id,
@@ -57,29 +70,30 @@ class VectorStorageService:
                     "start_position": chunk.start_position,
                     "end_position": chunk.end_position,
                     "content_length": len(chunk.content),
-                    "parent_section": chunk.parent_section or "",
-                    **chunk.metadata
+                    "parent_section": chunk.parent_section or ""
                 }
+                doc_metadata.update(chunk.metadata)
                 
-                if chunk.legal_context:
-                    doc_metadata.update({
-                        "has_legal_context": True,
-                        "legal_context": str(chunk.legal_context)
-                    })
-                
-                doc_metadata = self._ensure_json_serializable(doc_metadata)
-                
-                doc_metadata = self._filter_chromadb_metadata(doc_metadata)
+                if legal_context:
+                    doc_metadata["has_legal_context"] = True
+                    for key, value in legal_context.items():
+                        if isinstance(value, (str, int, float, bool)):
+                            doc_metadata[f"legal_{key}"] = value
+                        else:
+                            doc_metadata[f"legal_{key}"] = json.dumps(value, default=str)
                 
-                doc = Document(
-                    page_content=chunk.content,
-                    metadata=doc_metadata
-                )
-                
-                documents.append(doc)
                 ids.append(chunk.id)
+                embeddings.append(item["embedding"])
+                metadatas.append(self._to_chromadb_metadata(doc_metadata))
+                documents.append(chunk.content)
             
-            self.vectorstore.add_documents(documents, ids=ids)
+            await asyncio.to_thread(
+                self.vectorstore._collection.upsert,
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                documents=documents
+            )
             
             self.logger.info(f"Stored {len(embedded_chunks)} embeddings successfully")
             return True
@@ -92,10 +106,17 @@ class VectorStorageService:
                     query_embedding: List[float], 
                     n_results: Optional[int] = None,
                     document_id: Optional[str] = None,
-                    filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Search similar embeddings using LangChain Chroma"""
+                    filters: Optional[Dict[str, Any]] = None,
+                    include: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Search similar embeddings in the Chroma collection.
+        
+        Only ids and scores are returned by default; pass include=["documents", "metadatas"]
+        when the caller needs chunk content or metadata.
+        """
         try:
             n_results = n_results or min(10, self.config.max_results)
+            include = list(dict.fromkeys([*(include or []), "distances"]))
             
             where_filter = {}
             if document_id:
@@ -111,21 +132,36 @@ class VectorStorageService:
                     if key != "document_id":
                         where_filter[key] = value
             
-            docs_with_scores = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
-                embedding=query_embedding,
-                k=n_results,
-                filter=where_filter if where_filter else None
+            response = await asyncio.to_thread(
+                self.vectorstore._collection.query,
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where_filter if where_filter else None,
+                include=include
             )
             
-            search_results = []
-            for doc, score in docs_with_scores:
-                search_results.append({
-                    "id": doc.metadata.get("chunk_id", ""),
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "similarity": score,
-                    "distance": 1 - score
-                })
+            chunk_ids = response["ids"][0]
+            contents = response["documents"][0] if "documents" in include else [None] * len(chunk_ids)
+            metadatas = response["metadatas"][0] if "metadatas" in include else [None] * len(chunk_ids)
+            distances = np.asarray(response["distances"][0], dtype=np.float64)
+            similarities = 1.0 - distances
+            
+            search_results = [
+                {
+                    "id": chunk_id,
+                    "content": content,
+                    "metadata": metadata or {},
+                    "similarity": similarity,
+                    "distance": distance
+                }
+                for chunk_id, content, metadata, similarity, distance in zip(
+                    chunk_ids,
+                    contents,
+                    metadatas,
+                    similarities.tolist(),
+                    distances.tolist()
+                )
+            ]
             
             return search_results
             
@@ -136,10 +172,10 @@ class VectorStorageService:
     async def delete_document(self, document_id: str) -> bool:
         """Delete document chunks using LangChain Chroma"""
         try:
-            all_docs = self.vectorstore.get(where={"document_id": document_id})
+            all_docs = await asyncio.to_thread(self.vectorstore.get, where={"document_id": document_id}, include=[])
             
             if all_docs["ids"]:
-                self.vectorstore.delete(ids=all_docs["ids"])
+                await asyncio.to_thread(self.vectorstore.delete, ids=all_docs["ids"])
                 self.logger.info(f"Deleted {len(all_docs['ids'])} chunks for document {document_id}")
             
             return True
@@ -152,7 +188,7 @@ class VectorStorageService:
         """Get collection statistics using LangChain Chroma"""
         try:
             collection = self.vectorstore._collection
-            count = collection.count()
+            count = await asyncio.to_thread(collection.count)
             
             return {
                 "total_chunks": count,
@@ -165,14 +201,25 @@ class VectorStorageService:
             return {}
 
     async def list_documents(self) -> List[str]:
-        """List all document IDs using LangChain Chroma"""
+        """List all document IDs using LangChain Chroma, paging through chunk metadata"""
         try:
-            all_docs = self.vectorstore.get(include=["metadatas"])
-            
             document_ids = set()
-            for metadata in all_docs["metadatas"]:
-                if "document_id" in metadata:
-                    document_ids.add(metadata["document_id"])
+            offset = 0
+            page_size = self.config.list_page_size
+            
+            while True:
+                page = await asyncio.to_thread(
+                    self.vectorstore.get, include=["metadatas"], limit=page_size, offset=offset
+                )
+                metadatas = page["metadatas"]
+                
+                for metadata in metadatas:
+                    if metadata and "document_id" in metadata:
+                        document_ids.add(metadata["document_id"])
+                
+                if len(metadatas) < page_size:
+                    break
+                offset += page_size
             
             return list(document_ids)
                 
@@ -196,34 +243,29 @@ class VectorStorageService:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
 
-    def _ensure_json_serializable(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
-        """Ensure all metadata values are JSON serializable"""
-        serializable_metadata = {}
-        for key, value in metadata.items():
-            try:
-                if hasattr(value, 'value'):  
-                    serializable_metadata[key] = value.value
-                elif isinstance(value, (str, int, float, bool, type(None))):
-                    serializable_metadata[key] = value
-                elif isinstance(value, (list, tuple)):
-                    serializable_metadata[key] = [
-                        item.value if hasattr(item, 'value') else str(item) 
-                        for item in value
-                    ]
-                elif isinstance(value, dict):
-                    serializable_metadata[key] = self._ensure_json_serializable(value)
-                else:
-                    serializable_metadata[key] = str(value)
-            except Exception:
-                serializable_metadata[key] = str(value)
-        return serializable_metadata
-
-    def _filter_chromadb_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
-        """Filter metadata to only include types supported by ChromaDB (str, int, float, bool, None)"""
-        filtered_metadata = {}
+    def _to_chromadb_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert metadata to the types supported by ChromaDB (str, int, float, bool, None) in a single pass"""
+        chromadb_metadata = {}
         for key, value in metadata.items():
+            if hasattr(value, 'value'):
+                value = value.value
             if isinstance(value, (str, int, float, bool, type(None))):
-                filtered_metadata[key] = value
+                chromadb_metadata[key] = value
             else:
-                filtered_metadata[key] = str(value)
-        return filtered_metadata
\ No newline at end of file
+                try:
+                    chromadb_metadata[key] = str(self._ensure_json_serializable_value(value))
+                except Exception:
+                    chromadb_metadata[key] = str(value)
+        return chromadb_metadata
+
+    def _ensure_json_serializable_value(self, value: Any) -> Any:
+        """Ensure a nested metadata value is JSON serializable"""
+        if hasattr(value, 'value'):
+            return value.value
+        if isinstance(value, (str, int, float, bool, type(None))):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [item.value if hasattr(item, 'value') else str(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._ensure_json_serializable_value(item) for key, item in value.items()}
+        return str(value)
@@ -1,8 +1,9 @@
-from .retrieval_service import RetrievalService, RetrievalConfig
+from .retrieval_service import RetrievalService, RetrievalConfig, preload_token_encoder
 from .query_processor import QueryProcessor
 
 __all__ = [
     "RetrievalService",
     "RetrievalConfig", 
-    "QueryProcessor"
+    "QueryProcessor",
+    "preload_token_encoder"
 ]
\ No newline at end of file
@@ -2,19 +2,28 @@
 Handles query analysis, intent detection, and query enhancement
 for optimal search performance.
 """
+import os
 import re
 import logging
-from typing import Dict, List, Optional, Any
+import functools
+from typing import Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 try:
     import contractions
+    CONTRACTIONS_AVAILABLE = True
+except ImportError:
+    CONTRACTIONS_AVAILABLE = False
+
+try:
     from nltk.corpus import stopwords
-    from nltk.tokenize import word_tokenize
     import nltk
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
+    try:
+        stopwords.words('english')
+    except LookupError:
+        if not os.getenv("SKIP_NLTK_DOWNLOAD"):
+            nltk.download('stopwords', quiet=True)
     NLTK_AVAILABLE = True
 except ImportError:
     NLTK_AVAILABLE = False
@@ -30,68 +39,105 @@ class QueryIntent(Enum):
     PAYMENT = "payment"
     LIABILITY = "liability"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ProcessedQuery:
     original_query: str
     processed_query: str
     intent: QueryIntent
-    keywords: List[str]
+    keywords: Tuple[str, ...]
     metadata: Dict[str, Any]
 
 
+INTENT_PATTERNS = {
+    QueryIntent.DEFINITION: [
+        r'what\s+(?:is|are|does|means?)\s+',
+        r'define\s+',
+        r'definition\s+of\s+',
+        r'meaning\s+of\s+'
+    ],
+    QueryIntent.OBLIGATION: [
+        r'(?:must|shall|required?|obligat\w+|duty|responsible)',
+        r'what\s+(?:do|does)\s+\w+\s+(?:have\s+to|need\s+to)',
+        r'responsibilities?\s+of\s+'
+    ],
+    QueryIntent.TIMELINE: [
+        r'(?:when|timeline|deadline|due\s+date|within\s+\d+)',
+        r'how\s+long\s+',
+        r'\d+\s+days?\s+'
+    ],
+    QueryIntent.PARTY: [
+        r'(?:who\s+is|which\s+party|company|client|contractor)',
+        r'parties?\s+(?:to|in)\s+'
+    ],
+    QueryIntent.TERMINATION: [
+        r'(?:terminat\w+|end\w+|cancel\w+|expir\w+)',
+        r'how\s+to\s+(?:end|stop|cancel)',
+        r'grounds?\s+for\s+termination'
+    ],
+    QueryIntent.PAYMENT: [
+        r'(?:payment|fee|cost|price|amount|invoice|bill)',
+        r'how\s+much\s+',
+        r'money|dollars?\s+'
+    ],
+    QueryIntent.LIABILITY: [
+        r'(?:liability|liable|responsible|damages?|indemnif\w+)',
+        r'who\s+(?:pays?|is\s+responsible)',
+        r'damages?\s+for\s+'
+    ]
+}
+
+# Anchor every pattern at a word start so terms like "end" or "fee" stop matching
+# inside "amendment" or "coffee", and let the engine skip non-word positions quickly
+COMPILED_INTENT_PATTERNS = {
+    intent: re.compile("|".join(rf"\b(?:{pattern})" for pattern in patterns), re.ASCII)
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+
+TOKEN_PATTERN = re.compile(r'[a-z]{3,}')
+
+
+def _build_stop_words() -> frozenset:
+    """Build the stop word set, keeping modal verbs that matter in legal text"""
+    if NLTK_AVAILABLE:
+        try:
+            legal_keep_words = {'will', 'shall', 'must', 'may', 'can', 'should'}
+            return frozenset(set(stopwords.words('english')) - legal_keep_words)
+        except LookupError:
+            pass
+    
+    return frozenset({
+        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+        'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+        'have', 'has', 'had', 'do', 'does', 'did', 'would', 'could',
+        'this', 'that', 'these', 'those'
+    })
+
+
+STOP_WORDS = _build_stop_words()
+
+
 class QueryProcessor:
+    intent_patterns = INTENT_PATTERNS
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        
-        self.intent_patterns = {
-            QueryIntent.DEFINITION: [
-                r'what\s+(?:is|are|does|means?)\s+',
-                r'define\s+',
-                r'definition\s+of\s+',
-                r'meaning\s+of\s+'
-            ],
-            QueryIntent.OBLIGATION: [
-                r'(?:must|shall|required?|obligat\w+|duty|responsible)',
-                r'what\s+(?:do|does)\s+\w+\s+(?:have\s+to|need\s+to)',
-                r'responsibilities?\s+of\s+'
-            ],
-            QueryIntent.TIMELINE: [
-                r'(?:when|timeline|deadline|due\s+date|within\s+\d+)',
-                r'how\s+long\s+',
-                r'\d+\s+days?\s+'
-            ],
-            QueryIntent.PARTY: [
-                r'(?:who\s+is|which\s+party|company|client|contractor)',
-                r'parties?\s+(?:to|in)\s+'
-            ],
-            QueryIntent.TERMINATION: [
-                r'(?:terminat\w+|end\w+|cancel\w+|expir\w+)',
-                r'how\s+to\s+(?:end|stop|cancel)',
-                r'grounds?\s+for\s+termination'
-            ],
-            QueryIntent.PAYMENT: [
-                r'(?:payment|fee|cost|price|amount|invoice|bill)',
-                r'how\s+much\s+',
-                r'money|dollars?\s+'
-            ],
-            QueryIntent.LIABILITY: [
-                r'(?:liability|liable|responsible|damages?|indemnif\w+)',
-                r'who\s+(?:pays?|is\s+responsible)',
-                r'damages?\s+for\s+'
-            ]
-        }
-        
+        self._process_query_cached = functools.lru_cache(maxsize=4096)(self._process_query)
     
     def process_query(self, query: str) -> ProcessedQuery:
         """
         Process a user query for optimal retrieval.
         
         This implements Step 12: Query Preprocessing from the architecture.
+        Results are cached per raw query; ProcessedQuery is frozen so they are safe to share.
         """
+        return self._process_query_cached(query)
+    
+    def _process_query(self, query: str) -> ProcessedQuery:
+        """Clean the query, detect intent and extract keywords"""
         try:
             processed_query = self._clean_query(query)
             
-            intent = self._detect_intent(query)
+            intent = self._detect_intent(processed_query)
             
             keywords = self._extract_keywords(processed_query)
             
@@ -109,64 +155,33 @@ class QueryProcessor:
                 original_query=query,
                 processed_query=query,
                 intent=QueryIntent.GENERAL,
-                keywords=[],
+                keywords=(),
                 metadata={}
             )
     
     def _clean_query(self, query: str) -> str:
         """Clean and normalize the query using proper libraries"""
-        query = query.strip()
-        
-        if 'contractions' in globals():
+        if CONTRACTIONS_AVAILABLE:
             try:
-                query = contractions.fix(query)
+                query = contractions.fix(query, slang=False)
             except:
                 pass
-    
-        query = re.sub(r'\s+', ' ', query)
         
-        return query.lower()
+        return ' '.join(query.split()).lower()
     
-    def _detect_intent(self, query: str) -> QueryIntent:
-        """Detect the primary intent of the query"""
-        query_lower = query.lower()
-        
-        intent_scores = {}
-        for intent, patterns in self.intent_patterns.items():
-            score = 0
-            for pattern in patterns:
-                matches = len(re.findall(pattern, query_lower))
-                score += matches
-            intent_scores[intent] = score
+    def _detect_intent(self, query_lower: str) -> QueryIntent:
+        """Detect the primary intent of an already cleaned, lowercased query"""
+        intent_scores = {
+            intent: len(pattern.findall(query_lower))
+            for intent, pattern in COMPILED_INTENT_PATTERNS.items()
+        }
         
         if max(intent_scores.values()) > 0:
             return max(intent_scores, key=intent_scores.get)
         
         return QueryIntent.GENERAL
     
-    def _extract_keywords(self, query: str) -> List[str]:
-        """Extract important keywords using NLTK if available, fallback to custom"""
-        if NLTK_AVAILABLE:
-            try:
-                stop_words = set(stopwords.words('english'))
-                legal_keep_words = {'will', 'shall', 'must', 'may', 'can', 'should'}
-                stop_words = stop_words - legal_keep_words
-                
-                tokens = word_tokenize(query.lower())
-                keywords = [word for word in tokens 
-                           if word.isalpha() and word not in stop_words and len(word) > 2]
-                return keywords
-            except:
-                pass
-        
-        legal_stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'would', 'could',
-            'this', 'that', 'these', 'those'
-        }
-        
-        words = re.findall(r'\b\w+\b', query.lower())
-        keywords = [w for w in words if w not in legal_stop_words and len(w) > 2]
-        
-        return keywords
\ No newline at end of file
+    def _extract_keywords(self, query_lower: str) -> Tuple[str, ...]:
+        """Extract important keywords from a lowercased query, skipping stop words"""
+        return tuple(word for word in TOKEN_PATTERN.findall(query_lower)
+                     if word not in STOP_WORDS)
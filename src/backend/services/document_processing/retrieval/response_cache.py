@@ -0,0 +1,93 @@
+"""
+Semantic cache of generated answers, keyed by query embedding plus an exact-match key.
+"""
+import time
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+
+
+class SemanticResponseCache:
+    def __init__(self,
+                 max_entries: int = 2000,
+                 similarity_threshold: float = 0.95,
+                 ttl_seconds: float = 24 * 60 * 60):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        
+        self._embeddings: Optional[np.ndarray] = None
+        self._keys: List[Optional[Hashable]] = [None] * max_entries
+        self._values: List[Any] = [None] * max_entries
+        self._inserted_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._occupied = np.zeros(max_entries, dtype=bool)
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def lookup(self, query_embedding: List[float], key: Hashable) -> Optional[Any]:
+        """Return the cached value for the most similar query stored under the same key"""
+        if self._embeddings is None or not self._occupied.any():
+            self.misses += 1
+            return None
+        
+        now = time.monotonic()
+        self._occupied &= (now - self._inserted_at) < self.ttl_seconds
+        candidates = np.array(
+            [slot for slot in np.flatnonzero(self._occupied) if self._keys[slot] == key],
+            dtype=np.intp
+        )
+        if candidates.size == 0:
+            self.misses += 1
+            return None
+        
+        similarities = self._embeddings[candidates] @ self._normalize(query_embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            self.misses += 1
+            return None
+        
+        slot = candidates[best]
+        self._last_used[slot] = now
+        self.hits += 1
+        return self._values[slot]
+    
+    def insert(self, query_embedding: List[float], key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        query_vector = self._normalize(query_embedding)
+        if self._embeddings is None:
+            self._embeddings = np.zeros((self.max_entries, query_vector.shape[0]), dtype=np.float32)
+        
+        free_slots = np.flatnonzero(~self._occupied)
+        slot = int(free_slots[0]) if free_slots.size else int(np.argmin(self._last_used))
+        
+        now = time.monotonic()
+        self._embeddings[slot] = query_vector
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._inserted_at[slot] = now
+        self._last_used[slot] = now
+        self._occupied[slot] = True
+    
+    def clear(self):
+        """Drop every cached entry"""
+        self._occupied[:] = False
+        self._values = [None] * self.max_entries
+        self._keys = [None] * self.max_entries
+    
+    def get_stats(self) -> dict:
+        """Get hit and size counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": int(self._occupied.sum()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
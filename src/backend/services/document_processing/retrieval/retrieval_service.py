@@ -1,28 +1,122 @@
 import os
 import asyncio
+import heapq
+import functools
 import logging
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from datetime import datetime
+import time
+from collections import OrderedDict
+from operator import attrgetter
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from dataclasses import dataclass, replace
+import numpy as np
 import openai
 
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
 from .query_processor import QueryProcessor, ProcessedQuery
+from .response_cache import SemanticResponseCache
 from ..embedding.embedding_service import EmbeddingService
 from ..embedding.vector_storage_service import VectorStorageService
 from ..search_engine.elasticsearch_service import ElasticsearchService
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+ANSWER_ERROR_PREFIX = "I apologize, but I encountered an error generating an answer"
+
+SYSTEM_PROMPT_BASE = """You are Inquire, a legal AI assistant helping users understand legal documents. You provide accurate answers based on the provided document context."""
+
+SYSTEM_PROMPTS = {
+    intent: SYSTEM_PROMPT_BASE + instructions
+    for intent, instructions in {
+        "definition": " Focus on providing clear definitions and explanations of terms.",
+        "obligation": " Focus on identifying who must do what, under what conditions, and by when. Be very specific about obligations and responsibilities.",
+        "timeline": " Focus on deadlines, time periods, and temporal requirements. Be precise about dates and timeframes.",
+        "party": " Focus on identifying the parties involved and their roles in the agreement.",
+        "termination": " Focus on termination conditions, notice requirements, and procedures for ending the agreement.",
+        "payment": " Focus on payment terms, amounts, schedules, and financial obligations.",
+        "liability": " Focus on liability provisions, indemnification, and risk allocation between parties."
+    }.items()
+}
+
+DEFAULT_SYSTEM_PROMPT = SYSTEM_PROMPT_BASE + " Provide comprehensive, clear answers."
+
+# Fixed instructions first so repeated requests share a common prompt prefix
+ANSWER_PROMPT_TEMPLATE = """Based on the following legal document context, please answer the user's question accurately and comprehensively.
+
+Instructions:
+1. Answer based ONLY on the provided context
+2. If the context doesn't contain enough information, say so clearly
+3. For legal queries, be precise and provide clear explanations
+4. If there are conflicting information, mention the discrepancy
+5. Keep the answer concise but complete
+
+Legal Context:
+{context}
+
+Query Intent: {intent}
+
+User's Question: {question}
+
+Answer:"""
+
+# Tokens for the "[n] " marker and the blank line joining context chunks
+CONTEXT_CHUNK_OVERHEAD_TOKENS = 4
+
+
+@functools.lru_cache(maxsize=8)
+def _get_token_encoder(model: str):
+    if not TIKTOKEN_AVAILABLE:
+        logger.warning("tiktoken is not installed; approximating prompt tokens at four characters each")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        logger.warning(f"Token encoding for {model} unavailable ({e}); approximating prompt tokens at four characters each")
+        return None
+
+
+async def preload_token_encoder(model: str) -> bool:
+    """Load the tokenizer off the event loop; a cold tiktoken cache downloads the BPE file"""
+    return await asyncio.to_thread(_get_token_encoder, model) is not None
+
+
+@functools.lru_cache(maxsize=4096)
+def _count_tokens(text: str, model: str) -> int:
+    """Count prompt tokens, approximating at four characters per token without tiktoken"""
+    encoder = _get_token_encoder(model)
+    if encoder is None:
+        return len(text) // 4 + 1
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+@dataclass(frozen=True, slots=True)
 class RetrievalConfig:
     vector_weight: float = 0.6
     keyword_weight: float = 0.4
     max_search_results: int = 20
     max_context_chunks: int = 10
+    max_context_tokens: int = 6000
     openai_model: str = "gpt-4o-mini"
     max_tokens: int = 2000
     temperature: float = 0.1
+    openai_timeout: float = 60.0
+    openai_max_retries: int = 2
+    enable_reranking: bool = True
+    rrf_k: int = 60
+    embedding_cache_size: int = 1024
+    # Paraphrase hits can cross questions that differ only in negation, so the
+    # semantic answer cache is opt-in
+    enable_response_cache: bool = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+    response_cache_size: int = 2000
+    response_cache_threshold: float = 0.95
+    response_cache_ttl: float = 24 * 60 * 60
 
 
-@dataclass 
+@dataclass(slots=True)
 class SearchResult:
     id: str
     content: str
@@ -31,7 +125,7 @@ class SearchResult:
     highlights: Dict[str, List[str]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class RetrievalResult:
     query: str
     answer: str
@@ -55,14 +149,27 @@ class RetrievalService:
         self.elasticsearch_service = elasticsearch_service
         self.query_processor = QueryProcessor()
         
+        self._embed_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._embed_inflight: Dict[str, asyncio.Future] = {}
+        self._answer_inflight: Dict[Any, asyncio.Future] = {}
+        self.coalesced_requests = 0
+        self.response_cache = SemanticResponseCache(
+            max_entries=self.config.response_cache_size,
+            similarity_threshold=self.config.response_cache_threshold,
+            ttl_seconds=self.config.response_cache_ttl
+        )
+        
         openai_api_key = os.getenv("OPENAI_API_KEY")
         if not openai_api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
             
         self.embedding_service = EmbeddingService(openai_api_key)
         
-        openai.api_key = openai_api_key
-        self.openai_client = openai.OpenAI(api_key=openai_api_key)
+        self.openai_client = openai.AsyncOpenAI(
+            api_key=openai_api_key,
+            timeout=self.config.openai_timeout,
+            max_retries=self.config.openai_max_retries
+        )
         
         self.logger.info("RetrievalService initialized successfully")
     
@@ -77,217 +184,492 @@ class RetrievalService:
         Returns:
             RetrievalResult with answer, and metadata
         """
-        start_time = datetime.now()
-        warnings = []
+        start_time = time.perf_counter()
+        # Snapshot the config so a concurrent update_config can't mix settings mid-request
+        config = self.config
         
         try:
             self.logger.info(f"Step 12: Processing query: {query[:100]}...")
             processed_query = self.query_processor.process_query(query)
             
-            self.logger.info("Step 13: Performing hybrid search...")
-            search_results = await self._hybrid_search(processed_query, document_ids)
-            
-            if not search_results:
-                warnings.append("No relevant content found for this query")
-                return self._create_empty_result(query, processed_query, warnings, start_time)
-            
-            self.logger.info("Step 14: Generating answer with LLM...")
-            answer = await self._generate_answer(
-                processed_query, search_results
-            )
+            cache_key = self._response_cache_key(processed_query, document_ids)
+            query_embedding = None
+            if config.enable_response_cache:
+                query_embedding = await self._embed_cached(processed_query.processed_query)
+                cached_result = self.response_cache.lookup(query_embedding, cache_key)
+                if cached_result is not None:
+                    self.logger.info("Serving answer from semantic response cache")
+                    return replace(
+                        cached_result,
+                        query=query,
+                        processing_time=time.perf_counter() - start_time
+                    )
             
-            self.logger.info("Step 15: Formatting response...")
-            processing_time = (datetime.now() - start_time).total_seconds()
+            # Identical questions already being answered share the in-flight result
+            inflight_key = (processed_query.processed_query, cache_key)
+            result = await self._await_inflight(inflight_key)
+            if result is not None:
+                return replace(result, query=query, processing_time=time.perf_counter() - start_time)
             
-            return RetrievalResult(
-                query=query,
-                answer=answer,
-                sources_used=list(set(r.metadata.get('document_id', '') for r in search_results)),
-                processing_time=processing_time,
-                query_intent=processed_query.intent.value,
-                warnings=warnings,
-                search_results=search_results[:self.config.max_context_chunks]
-            )
+            pending = asyncio.get_running_loop().create_future()
+            self._answer_inflight[inflight_key] = pending
+            try:
+                self.logger.info("Step 13: Performing hybrid search...")
+                search_results, complete = await self._hybrid_search_with_status(
+                    processed_query, document_ids, config=config
+                )
+                
+                cache_entry = (query_embedding, cache_key) if query_embedding is not None and complete else None
+                result = await self._answer_from_results(
+                    query, processed_query, search_results, start_time, cache_entry, config=config
+                )
+            except Exception as e:
+                pending.set_exception(e)
+                pending.exception()  # avoid "never retrieved" warnings when nobody was waiting
+                raise
+            else:
+                pending.set_result(result)
+            finally:
+                del self._answer_inflight[inflight_key]
+                if not pending.done():
+                    pending.cancel()
+            return result
             
         except Exception as e:
             self.logger.error(f"Retrieval failed: {str(e)}")
-            processing_time = (datetime.now() - start_time).total_seconds()
-            
-            return RetrievalResult(
-                query=query,
-                answer=f"I encountered an error while processing your question: {str(e)}",
-                sources_used=[],
-                processing_time=processing_time,
-                query_intent="error",
-                warnings=[f"Error: {str(e)}"],
-                search_results=[]
-            )
+            return self._create_error_result(query, e, start_time)
     
+    async def _await_inflight(self, inflight_key) -> Optional[RetrievalResult]:
+        """Wait for an identical question that is already being answered, or None if there is none"""
+        while (pending := self._answer_inflight.get(inflight_key)) is not None:
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled: retry, taking over as leader if nobody else has
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            self.coalesced_requests += 1
+            return result
+        return None
     
+    async def _answer_from_results(self, 
+                                 query: str, 
+                                 processed_query: ProcessedQuery, 
+                                 search_results: List[SearchResult], 
+                                 start_time: float, 
+                                 cache_entry: Optional[Tuple[np.ndarray, Any]] = None, 
+                                 config: Optional[RetrievalConfig] = None) -> RetrievalResult:
+        """Generate the answer for retrieved results, caching it under cache_entry on success"""
+        config = config or self.config
+        warnings = []
+        if not search_results:
+            warnings.append("No relevant content found for this query")
+            return self._create_empty_result(query, processed_query, warnings, start_time)
+        
+        self.logger.info("Step 14: Generating answer with LLM...")
+        answer = "".join([
+            delta async for delta in self._generate_answer(processed_query, search_results, config=config)
+        ])
+        
+        self.logger.info("Step 15: Formatting response...")
+        return self._finish_answer(
+            query, processed_query, search_results, answer, start_time, cache_entry, config=config
+        )
+    
+    def _finish_answer(self, 
+                       query: str, 
+                       processed_query: ProcessedQuery, 
+                       search_results: List[SearchResult], 
+                       answer: str, 
+                       start_time: float, 
+                       cache_entry: Optional[Tuple[np.ndarray, Any]] = None, 
+                       config: Optional[RetrievalConfig] = None) -> RetrievalResult:
+        """Build the result for a generated answer and cache it unless generation failed"""
+        config = config or self.config
+        result = RetrievalResult(
+            query=query,
+            answer=answer,
+            sources_used=list(dict.fromkeys(doc_id for r in search_results if (doc_id := r.metadata.get('document_id')))),
+            processing_time=time.perf_counter() - start_time,
+            query_intent=processed_query.intent.value,
+            warnings=[],
+            search_results=search_results[:config.max_context_chunks]
+        )
+        # Only answers built from both backends are cached; a degraded search is not reused
+        if cache_entry is not None and not answer.startswith(ANSWER_ERROR_PREFIX):
+            query_embedding, cache_key = cache_entry
+            self.response_cache.insert(query_embedding, cache_key, result)
+        return result
+    
+    async def retrieve_answer_stream(self, 
+                                   query: str, 
+                                   document_ids: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """
+        Yield answer text as the LLM produces it instead of waiting for the full completion.
+        When the response cache is enabled, a cached answer is yielded in one piece and a
+        completed answer is cached once the stream finishes. A question identical to one
+        already streaming waits for that answer and yields it in one piece.
+        """
+        start_time = time.perf_counter()
+        config = self.config
+        processed_query = self.query_processor.process_query(query)
+        
+        cache_key = self._response_cache_key(processed_query, document_ids)
+        query_embedding = None
+        if config.enable_response_cache:
+            query_embedding = await self._embed_cached(processed_query.processed_query)
+            cached_result = self.response_cache.lookup(query_embedding, cache_key)
+            if cached_result is not None:
+                self.logger.info("Serving answer from semantic response cache")
+                yield cached_result.answer
+                return
+        
+        inflight_key = (processed_query.processed_query, cache_key)
+        result = await self._await_inflight(inflight_key)
+        if result is not None:
+            yield result.answer
+            return
+        
+        pending = asyncio.get_running_loop().create_future()
+        self._answer_inflight[inflight_key] = pending
+        try:
+            search_results, complete = await self._hybrid_search_with_status(
+                processed_query, document_ids, config=config
+            )
+            self.logger.info(f"Retrieved {len(search_results)} search results for query: {query[:100]}")
+            
+            answer_parts = []
+            async for delta in self._generate_answer(processed_query, search_results, config=config):
+                answer_parts.append(delta)
+                yield delta
+            
+            cache_entry = None
+            if query_embedding is not None and search_results and complete:
+                cache_entry = (query_embedding, cache_key)
+            result = self._finish_answer(
+                query, processed_query, search_results, "".join(answer_parts),
+                start_time, cache_entry, config=config
+            )
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()
+            raise
+        else:
+            pending.set_result(result)
+        finally:
+            # A client disconnect cancels the stream; waiting followers then retry as leader
+            del self._answer_inflight[inflight_key]
+            if not pending.done():
+                pending.cancel()
     
     async def _generate_answer(self, 
                              processed_query: ProcessedQuery, 
-                             search_results: List[SearchResult]) -> str:
+                             search_results: List[SearchResult], 
+                             config: Optional[RetrievalConfig] = None) -> AsyncIterator[str]:
         """
         Generate answer using LLM with retrieved context.
         
         """
+        config = config or self.config
         try:
-            context_pieces = []
-            
-            for i, result in enumerate(search_results[:self.config.max_context_chunks], 1):
-                context_pieces.append(f"[{i}] {result.content}")
-            
-            context = "\n\n".join(context_pieces)
+            context = self._prepare_context(search_results, config=config)
             
             prompt = self._create_answer_prompt(processed_query, context)
             
-            response = self.openai_client.chat.completions.create(
-                model=self.config.openai_model,
+            response = await self.openai_client.chat.completions.create(
+                model=config.openai_model,
                 messages=[
                     {"role": "system", "content": self._get_system_prompt(processed_query.intent)},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature,
-                stream=True
+                max_tokens=config.max_tokens,
+                temperature=config.temperature,
+                stream=True,
+                stream_options={"include_usage": True}
             )
             
-            for chunk in response:
+            async for chunk in response:
+                if chunk.usage:
+                    details = chunk.usage.prompt_tokens_details
+                    self.logger.info(
+                        f"LLM usage: {chunk.usage.prompt_tokens} prompt tokens "
+                        f"({details.cached_tokens if details else 0} cached), "
+                        f"{chunk.usage.completion_tokens} completion tokens"
+                    )
+                if not chunk.choices:
+                    continue
                 delta = chunk.choices[0].delta.content
                 if delta:
                     yield delta
-                    await asyncio.sleep(0)  
             
         except Exception as e:
             self.logger.error(f"Answer generation failed: {str(e)}")
-            yield f"I apologize, but I encountered an error generating an answer: {str(e)}"
+            yield f"{ANSWER_ERROR_PREFIX}: {str(e)}"
     
     async def _hybrid_search(self, 
                            processed_query: ProcessedQuery, 
-                           document_ids: Optional[List[str]] = None) -> List[SearchResult]:
+                           document_ids: Optional[List[str]] = None, 
+                           config: Optional[RetrievalConfig] = None) -> List[SearchResult]:
         """Perform hybrid search combining vector similarity and keyword matching"""
+        search_results, _ = await self._hybrid_search_with_status(processed_query, document_ids, config=config)
+        return search_results
+    
+    async def _hybrid_search_with_status(self, 
+                                       processed_query: ProcessedQuery, 
+                                       document_ids: Optional[List[str]] = None, 
+                                       config: Optional[RetrievalConfig] = None) -> Tuple[List[SearchResult], bool]:
+        """Hybrid search that also reports whether both backends returned results"""
+        # Snapshot the config so a concurrent update_config can't mix settings mid-search
+        config = config or self.config
+        document_ids = self._unique_document_ids(document_ids)
         try:
-            query_embedding = await self.embedding_service.embed_query(
-                processed_query.processed_query
-            )
-            
-            filters = None
-            if document_ids:
-                if len(document_ids) == 1:
-                    filters = {"document_id": document_ids[0]}
-                else:
-                    filters = {"document_id": {"$in": document_ids}}
-            
             vector_results, keyword_results = await asyncio.gather(
-                self.vector_service.search_similar(
-                    query_embedding=query_embedding,
-                    n_results=self.config.max_search_results,
-                    filters=filters
-                ),
+                self._vector_search(processed_query, document_ids, config=config),
                 self.elasticsearch_service.search_text(
                     query=processed_query.processed_query,
-                    size=self.config.max_search_results,
+                    size=config.max_search_results,
                     document_ids=document_ids
                 )
             )
             
-            search_results = []
-            
-            for result in vector_results:
-                search_result = SearchResult(
-                    id=result.get("id", ""),
-                    content=result.get("content", ""),
-                    metadata=result.get("metadata", {}),
-                    score=result.get("similarity", 0.0)
+            if config.enable_reranking:
+                search_results = self._reciprocal_rank_fusion(
+                    vector_results, keyword_results,
+                    weights=[config.vector_weight, config.keyword_weight],
+                    config=config
                 )
-                search_results.append(search_result)
-            
-            keyword_dict = {r.get("id", ""): r for r in keyword_results}
-            
-            for search_result in search_results:
-                if search_result.id in keyword_dict:
-                    keyword_result = keyword_dict[search_result.id]
-                    keyword_score = keyword_result.get("score", 0.0)
-                    search_result.highlights = keyword_result.get("highlights", {}) 
-                    normalized_vector = min(1.0, search_result.score)
-                    normalized_keyword = min(1.0, keyword_score / 10.0) if keyword_score > 0 else 0.0
-                    search_result.score = (
-                        normalized_vector * self.config.vector_weight +
-                        normalized_keyword * self.config.keyword_weight
-                    )
-                    del keyword_dict[search_result.id]
-            
-            for keyword_result in keyword_dict.values():
-                keyword_score = keyword_result.get("score", 0.0)
-                normalized_keyword = min(1.0, keyword_score / 10.0) if keyword_score > 0 else 0.0
-                search_result = SearchResult(
-                    id=keyword_result.get("id", ""),
-                    content=keyword_result.get("content", ""),
-                    metadata=keyword_result.get("metadata", {}),
-                    score=normalized_keyword * self.config.keyword_weight,
-                    highlights=keyword_result.get("highlights", {})
-                )
-                search_results.append(search_result)
-            
-            search_results.sort(key=lambda x: x.score, reverse=True)
+            else:
+                search_results = self._weighted_combination(vector_results, keyword_results, config=config)
             
             self.logger.info(f"Hybrid search returned {len(search_results)} results for document_ids: {document_ids}")
-            return search_results[:self.config.max_context_chunks]
+            # Both services log and return nothing on failure, so an empty side means degraded retrieval
+            return search_results, bool(vector_results) and bool(keyword_results)
             
         except Exception as e:
             self.logger.error(f"Hybrid search failed: {str(e)}")
-            return []
+            return [], False
     
-    def _create_answer_prompt(self, processed_query: ProcessedQuery, context: str) -> str:
-        return f"""Based on the following legal document context, please answer the user's question accurately and comprehensively.
-
-User's Question: {processed_query.original_query}
-
-Query Intent: {processed_query.intent.value}
-
-Legal Context:
-{context}
-
-Instructions:
-1. Answer based ONLY on the provided context
-2. If the context doesn't contain enough information, say so clearly
-3. For legal queries, be precise and provide clear explanations
-4. If there are conflicting information, mention the discrepancy
-5. Keep the answer concise but complete
-
-Answer:"""
+    @staticmethod
+    def _response_cache_key(processed_query: ProcessedQuery, document_ids: Optional[List[str]]):
+        # Keywords keep paraphrases about different parties or terms apart
+        return (processed_query.intent, frozenset(processed_query.keywords), frozenset(document_ids or ()))
     
-    def _get_system_prompt(self, intent) -> str:
-        """Get system prompt based on query intent"""
-        base_prompt = """You are Inquire, a legal AI assistant helping users understand legal documents. You provide accurate answers based on the provided document context."""
+    @staticmethod
+    def _unique_document_ids(document_ids: Optional[List[str]]) -> Optional[List[str]]:
+        """Drop repeated ids so backend filters stay small and a lone id can use an exact match"""
+        if not document_ids:
+            return None
+        return list(dict.fromkeys(document_ids))
+    
+    def _weighted_combination(self, 
+                              vector_results: List[Dict[str, Any]], 
+                              keyword_results: List[Dict[str, Any]], 
+                              config: Optional[RetrievalConfig] = None) -> List[SearchResult]:
+        """Combine normalized vector and keyword scores with the configured weights"""
+        config = config or self.config
+        # Content comes from the best vector hit, else the first keyword hit;
+        # SearchResult objects are only built for the ranked top-K
+        payloads: Dict[str, Dict[str, Any]] = {}
+        highlights: Dict[str, Dict[str, List[str]]] = {}
+        vector_scores: Dict[str, float] = {}
+        keyword_scores: Dict[str, float] = {}
+        
+        # Duplicate ids keep their best score from each source
+        for result in vector_results:
+            result_id = result.get("id", "")
+            similarity = result.get("similarity", 0.0)
+            if vector_scores.get(result_id, float("-inf")) >= similarity:
+                continue
+            vector_scores[result_id] = similarity
+            payloads[result_id] = result
         
-        intent_specific = {
-            "definition": " Focus on providing clear definitions and explanations of terms.",
-            "obligation": " Focus on identifying who must do what, under what conditions, and by when. Be very specific about obligations and responsibilities.",
-            "timeline": " Focus on deadlines, time periods, and temporal requirements. Be precise about dates and timeframes.",
-            "party": " Focus on identifying the parties involved and their roles in the agreement.",
-            "termination": " Focus on termination conditions, notice requirements, and procedures for ending the agreement.",
-            "payment": " Focus on payment terms, amounts, schedules, and financial obligations.",
-            "liability": " Focus on liability provisions, indemnification, and risk allocation between parties."
-        }
+        for result in keyword_results:
+            result_id = result.get("id", "")
+            keyword_score = result.get("score", 0.0)
+            if keyword_scores.get(result_id, float("-inf")) >= keyword_score:
+                continue
+            keyword_scores[result_id] = keyword_score
+            payloads.setdefault(result_id, result)
+            highlights[result_id] = result.get("highlights", {})
+        
+        scores: Dict[str, float] = {}
+        for result_id in payloads:
+            keyword_score = keyword_scores.get(result_id)
+            if keyword_score is None:
+                # Vector-only hits keep their raw similarity
+                scores[result_id] = vector_scores[result_id]
+                continue
+            normalized_vector = min(1.0, vector_scores.get(result_id, 0.0))
+            normalized_keyword = min(1.0, keyword_score / 10.0) if keyword_score > 0 else 0.0
+            scores[result_id] = (
+                normalized_vector * config.vector_weight +
+                normalized_keyword * config.keyword_weight
+            )
         
-        return base_prompt + intent_specific.get(intent.value, " Provide comprehensive, clear answers.")
+        return [
+            SearchResult(
+                id=result_id,
+                content=payloads[result_id].get("content", ""),
+                metadata=payloads[result_id].get("metadata", {}),
+                score=scores[result_id],
+                highlights=highlights.get(result_id)
+            )
+            for result_id in heapq.nlargest(config.max_context_chunks, scores, key=scores.__getitem__)
+        ]
+    
+    def _reciprocal_rank_fusion(self, 
+                                *rankings: List[Dict[str, Any]], 
+                                weights: Optional[List[float]] = None, 
+                                config: Optional[RetrievalConfig] = None) -> List[SearchResult]:
+        """Fuse any number of rankings with weighted reciprocal rank fusion in a single pass"""
+        config = config or self.config
+        k = config.rrf_k
+        weights = weights or [1.0] * len(rankings)
+        fused: Dict[str, SearchResult] = {}
+        
+        for ranked_results, weight in zip(rankings, weights):
+            seen_ids = set()
+            for rank, result in enumerate(ranked_results, 1):
+                result_id = result.get("id", "")
+                # Only the best rank of a duplicate counts within one ranking
+                if result_id in seen_ids:
+                    continue
+                seen_ids.add(result_id)
+                rrf_score = weight / (k + rank)
+                
+                search_result = fused.get(result_id)
+                if search_result is None:
+                    fused[result_id] = SearchResult(
+                        id=result_id,
+                        content=result.get("content", ""),
+                        metadata=result.get("metadata", {}),
+                        score=rrf_score,
+                        highlights=result.get("highlights")
+                    )
+                else:
+                    search_result.score += rrf_score
+                    if "highlights" in result:
+                        search_result.highlights = result["highlights"]
+        
+        return heapq.nlargest(config.max_context_chunks, fused.values(), key=attrgetter("score"))
+    
+    async def _vector_search(self, 
+                           processed_query: ProcessedQuery, 
+                           document_ids: Optional[List[str]] = None, 
+                           config: Optional[RetrievalConfig] = None) -> List[Dict[str, Any]]:
+        """Embed the query and search the vector store"""
+        query_embedding = await self._embed_cached(processed_query.processed_query)
+        return await self._search_vectors(query_embedding, document_ids, config=config)
+    
+    async def _search_vectors(self, 
+                            query_embedding: np.ndarray, 
+                            document_ids: Optional[List[str]] = None, 
+                            config: Optional[RetrievalConfig] = None) -> List[Dict[str, Any]]:
+        """Search the vector store with an existing query embedding"""
+        config = config or self.config
+        return await self.vector_service.search_similar(
+            query_embedding=query_embedding,
+            n_results=config.max_search_results,
+            filters=self._document_filters(document_ids),
+            include=["documents", "metadatas"]
+        )
+    
+    @staticmethod
+    def _document_filters(document_ids: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        if not document_ids:
+            return None
+        if len(document_ids) == 1:
+            return {"document_id": document_ids[0]}
+        return {"document_id": {"$in": document_ids}}
+    
+    async def _embed_cached(self, query: str) -> np.ndarray:
+        """Embed a normalized query, reusing cached and in-flight embeddings"""
+        embedding = self._embed_cache.get(query)
+        if embedding is not None:
+            self._embed_cache.move_to_end(query)
+            return embedding
+        
+        while (pending := self._embed_inflight.get(query)) is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled: retry, taking over as leader if nobody else has
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+        
+        pending = asyncio.get_running_loop().create_future()
+        self._embed_inflight[query] = pending
+        try:
+            embedding = np.asarray(await self.embedding_service.embed_query(query), dtype=np.float32)
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # avoid "never retrieved" warnings when nobody was waiting
+            raise
+        else:
+            pending.set_result(embedding)
+        finally:
+            del self._embed_inflight[query]
+            if not pending.done():
+                pending.cancel()
+        
+        self._embed_cache[query] = embedding
+        if len(self._embed_cache) > self.config.embedding_cache_size:
+            self._embed_cache.popitem(last=False)
+        return embedding
+    
+    def _prepare_context(self, 
+                         search_results: List[SearchResult], 
+                         config: Optional[RetrievalConfig] = None) -> str:
+        """Build the numbered context block, packing chunks until the token budget is spent"""
+        config = config or self.config
+        budget = config.max_context_tokens
+        pieces = []
+        for i, result in enumerate(search_results[:config.max_context_chunks], 1):
+            piece = f"[{i}] {result.content}"
+            # Count the bare content so the memo key doesn't depend on the chunk's rank
+            tokens = _count_tokens(result.content, config.openai_model) + CONTEXT_CHUNK_OVERHEAD_TOKENS
+            if pieces and tokens > budget:
+                break
+            pieces.append(piece)
+            budget -= tokens
+        
+        return "\n\n".join(pieces)
+    
+    def _create_answer_prompt(self, processed_query: ProcessedQuery, context: str) -> str:
+        return ANSWER_PROMPT_TEMPLATE.format(
+            context=context,
+            intent=processed_query.intent.value,
+            question=processed_query.original_query
+        )
     
+    def _get_system_prompt(self, intent) -> str:
+        """Get system prompt based on query intent"""
+        return SYSTEM_PROMPTS.get(intent.value, DEFAULT_SYSTEM_PROMPT)
     
+    def _create_error_result(self, query: str, error: Exception, start_time: float) -> RetrievalResult:
+        """Create a result describing a failed retrieval"""
+        return RetrievalResult(
+            query=query,
+            answer=f"I encountered an error while processing your question: {str(error)}",
+            sources_used=[],
+            processing_time=time.perf_counter() - start_time,
+            query_intent="error",
+            warnings=[f"Error: {str(error)}"],
+            search_results=[]
+        )
     
     def _create_empty_result(self, 
                            query: str, 
                            processed_query: ProcessedQuery, 
                            warnings: List[str], 
-                           start_time: datetime) -> RetrievalResult:
+                           start_time: float) -> RetrievalResult:
         """Create an empty result when no content is found"""
-        processing_time = (datetime.now() - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
         
         return RetrievalResult(
             query=query,
             answer="I couldn't find relevant information in the available documents to answer your question. Please try rephrasing your question or ensure the relevant documents have been uploaded and processed.",
-            citations=[],
             sources_used=[],
             processing_time=processing_time,
             query_intent=processed_query.intent.value,
@@ -305,10 +687,20 @@ Answer:"""
         processed_query = self.query_processor.process_query(query)
         return await self._hybrid_search(processed_query, document_ids)
     
-    
-    
     def update_config(self, config: RetrievalConfig):
         """Update retrieval configuration"""
+        previous = self.config
         self.config = config
+        # Cached answers were produced with the old weights and limits
+        if (config.response_cache_size, config.response_cache_threshold, config.response_cache_ttl) != (
+            previous.response_cache_size, previous.response_cache_threshold, previous.response_cache_ttl
+        ):
+            self.response_cache = SemanticResponseCache(
+                max_entries=config.response_cache_size,
+                similarity_threshold=config.response_cache_threshold,
+                ttl_seconds=config.response_cache_ttl
+            )
+        else:
+            self.response_cache.clear()
         self.logger.info("Retrieval configuration updated")
     
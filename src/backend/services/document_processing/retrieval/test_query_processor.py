@@ -0,0 +1,36 @@
+import pytest
+
+from services.document_processing.retrieval.query_processor import (
+    CONTRACTIONS_AVAILABLE, QueryIntent, QueryProcessor
+)
+
+
+def test_clean_query_normalizes_whitespace_and_case():
+    processor = QueryProcessor()
+    
+    assert processor._clean_query("  What   ARE the\tTerms?\n ") == "what are the terms?"
+
+
+@pytest.mark.skipif(not CONTRACTIONS_AVAILABLE, reason="contractions is not installed")
+def test_clean_query_expands_contractions():
+    processor = QueryProcessor()
+    
+    assert processor._clean_query("Licensee doesn't assign") == "licensee does not assign"
+    assert processor._clean_query("Licensee doesn’t assign") == "licensee does not assign"
+
+
+@pytest.mark.skipif(not CONTRACTIONS_AVAILABLE, reason="contractions is not installed")
+def test_clean_query_expands_contractions_without_apostrophes():
+    # contractions.fix(slang=False) still rewrites these, so queries are not gated on an apostrophe
+    processor = QueryProcessor()
+    
+    assert processor._clean_query("I wanna know if we're gonna pay") == "i want to know if we are going to pay"
+
+
+def test_intent_patterns_match_only_at_word_starts():
+    processor = QueryProcessor()
+    
+    # "endment" and "fee" sit inside these words and must not count
+    assert processor._detect_intent("summarize the coffee supply amendment") == QueryIntent.GENERAL
+    assert processor._detect_intent("notice of cancellation") == QueryIntent.TERMINATION
+    assert processor._detect_intent("list every fee") == QueryIntent.PAYMENT
@@ -0,0 +1,70 @@
+from services.document_processing.retrieval import response_cache
+from services.document_processing.retrieval.response_cache import SemanticResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+def make_cache(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    return SemanticResponseCache(**kwargs), clock
+
+
+def test_hit_for_similar_query_with_same_key(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_entries=4, similarity_threshold=0.95)
+    cache.insert([1.0, 0.0, 0.0], "key", "answer")
+    
+    assert cache.lookup([0.99, 0.05, 0.0], "key") == "answer"
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_miss_below_threshold_or_for_other_key(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_entries=4, similarity_threshold=0.95)
+    cache.insert([1.0, 0.0, 0.0], "key", "answer")
+    
+    assert cache.lookup([0.0, 1.0, 0.0], "key") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "other") is None
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache, clock = make_cache(monkeypatch, max_entries=4, ttl_seconds=60)
+    cache.insert([1.0, 0.0], "key", "answer")
+    
+    clock.now += 59
+    assert cache.lookup([1.0, 0.0], "key") == "answer"
+    clock.now += 2
+    assert cache.lookup([1.0, 0.0], "key") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_full_cache_evicts_least_recently_used(monkeypatch):
+    cache, clock = make_cache(monkeypatch, max_entries=2)
+    cache.insert([1.0, 0.0], "a", "first")
+    clock.now += 1
+    cache.insert([0.0, 1.0], "b", "second")
+    clock.now += 1
+    assert cache.lookup([1.0, 0.0], "a") == "first"
+    
+    clock.now += 1
+    cache.insert([1.0, 1.0], "c", "third")
+    
+    assert cache.lookup([0.0, 1.0], "b") is None
+    assert cache.lookup([1.0, 0.0], "a") == "first"
+    assert cache.lookup([1.0, 1.0], "c") == "third"
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_clear_drops_entries(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_entries=2)
+    cache.insert([1.0, 0.0], "key", "answer")
+    cache.clear()
+    
+    assert cache.lookup([1.0, 0.0], "key") is None
+    assert cache.get_stats()["entries"] == 0
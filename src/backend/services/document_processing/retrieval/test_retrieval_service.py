@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from dataclasses import replace
+
+import pytest
+
+from services.document_processing.retrieval import retrieval_service
+from services.document_processing.retrieval.query_processor import QueryProcessor
+from services.document_processing.retrieval.response_cache import SemanticResponseCache
+from services.document_processing.retrieval.retrieval_service import (
+    RetrievalConfig, RetrievalService, SearchResult
+)
+
+
+def make_service(**config):
+    # Skip __init__ so tests need no OpenAI key or live backends
+    service = RetrievalService.__new__(RetrievalService)
+    service.config = RetrievalConfig(**config)
+    service.logger = logging.getLogger(__name__)
+    service.query_processor = QueryProcessor()
+    service._answer_inflight = {}
+    service.coalesced_requests = 0
+    service.response_cache = SemanticResponseCache()
+    return service
+
+
+def stub_backends(service, release, fail=False):
+    """Replace search and generation with stubs; search waits on release and counts calls"""
+    calls = []
+    
+    async def search(processed_query, document_ids=None, config=None):
+        calls.append(processed_query.processed_query)
+        await release.wait()
+        if fail:
+            raise RuntimeError("search backend down")
+        return [SearchResult(id="a", content="clause", metadata={"document_id": "doc"})], True
+    
+    async def generate(processed_query, search_results, config=None):
+        for delta in ("The ", "answer"):
+            yield delta
+    
+    service._hybrid_search_with_status = search
+    service._generate_answer = generate
+    return calls
+
+
+async def collect(stream):
+    return "".join([delta async for delta in stream])
+
+
+def hit(result_id, **fields):
+    return {"id": result_id, "content": f"content {result_id}", "metadata": {}, **fields}
+
+
+def test_rrf_ranks_results_found_by_both_sources_first():
+    service = make_service()
+    vector = [hit("a"), hit("b"), hit("c")]
+    keyword = [hit("c"), hit("d")]
+    
+    ranked = service._reciprocal_rank_fusion(vector, keyword)
+    
+    # b and d tie on rank 2 and keep their first-seen order
+    assert [r.id for r in ranked] == ["c", "a", "b", "d"]
+    assert ranked[0].score == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_rrf_counts_only_the_best_rank_of_a_duplicate():
+    service = make_service()
+    ranked = service._reciprocal_rank_fusion([hit("a"), hit("a"), hit("b")])
+    scores = {r.id: r.score for r in ranked}
+    
+    assert scores == {"a": pytest.approx(1 / 61), "b": pytest.approx(1 / 63)}
+
+
+def test_rrf_applies_source_weights():
+    service = make_service()
+    ranked = service._reciprocal_rank_fusion([hit("a"), hit("b")], [hit("b")], weights=[0.9, 0.1])
+    scores = {r.id: r.score for r in ranked}
+    
+    assert scores["a"] == pytest.approx(0.9 / 61)
+    assert scores["b"] == pytest.approx(0.9 / 62 + 0.1 / 61)
+    assert [r.id for r in ranked] == ["b", "a"]
+
+
+def test_hybrid_search_fuses_with_configured_weights_by_default():
+    service = make_service(vector_weight=0.9, keyword_weight=0.1)
+    
+    async def vector_search(processed_query, document_ids=None, config=None):
+        return [hit("a", similarity=0.9), hit("b", similarity=0.8)]
+    
+    class FakeElasticsearch:
+        async def search_text(self, query, size, document_ids=None):
+            return [hit("b", score=3.0)]
+    
+    service._vector_search = vector_search
+    service.elasticsearch_service = FakeElasticsearch()
+    processed_query = service.query_processor.process_query("What is the term?")
+    
+    ranked, complete = asyncio.run(service._hybrid_search_with_status(processed_query))
+    
+    assert complete
+    assert [r.id for r in ranked] == ["b", "a"]
+    assert ranked[0].score == pytest.approx(0.9 / 62 + 0.1 / 61)
+
+
+def test_rrf_keeps_only_max_context_chunks():
+    service = make_service(max_context_chunks=2)
+    ranked = service._reciprocal_rank_fusion([hit(str(i)) for i in range(5)])
+    
+    assert [r.id for r in ranked] == ["0", "1"]
+
+
+def test_weighted_combination_orders_by_combined_score():
+    service = make_service(vector_weight=0.6, keyword_weight=0.4)
+    vector = [hit("a", similarity=0.9), hit("b", similarity=0.5)]
+    keyword = [hit("b", score=10.0, highlights={"content": ["b"]}), hit("c", score=5.0)]
+    
+    ranked = service._weighted_combination(vector, keyword)
+    scores = {r.id: r.score for r in ranked}
+    
+    assert [r.id for r in ranked] == ["a", "b", "c"]
+    assert scores["a"] == 0.9
+    assert scores["b"] == pytest.approx(0.5 * 0.6 + 1.0 * 0.4)
+    assert scores["c"] == pytest.approx(0.5 * 0.4)
+    assert ranked[1].highlights == {"content": ["b"]}
+
+
+def test_weighted_combination_keeps_best_score_per_duplicate_id():
+    service = make_service(vector_weight=0.6, keyword_weight=0.4)
+    vector = [hit("a", similarity=0.9), hit("a", similarity=0.2)]
+    keyword = [hit("b", score=9.0), hit("b", score=1.0)]
+    
+    ranked = service._weighted_combination(vector, keyword)
+    scores = {r.id: r.score for r in ranked}
+    
+    assert [r.id for r in ranked] == ["a", "b"]
+    assert scores["a"] == 0.9
+    assert scores["b"] == pytest.approx(0.9 * 0.4)
+
+
+def test_weighted_combination_keeps_only_max_context_chunks():
+    service = make_service(max_context_chunks=1)
+    ranked = service._weighted_combination(
+        [hit("a", similarity=0.2), hit("b", similarity=0.8)], []
+    )
+    
+    assert [r.id for r in ranked] == ["b"]
+
+
+def test_identical_streamed_questions_share_one_answer():
+    async def scenario():
+        service = make_service()
+        release = asyncio.Event()
+        calls = stub_backends(service, release)
+        
+        leader = asyncio.create_task(collect(service.retrieve_answer_stream("What is the term?")))
+        follower = asyncio.create_task(collect(service.retrieve_answer_stream("what is the term?")))
+        await asyncio.sleep(0)
+        release.set()
+        return calls, await leader, await follower, service
+    
+    calls, leader, follower, service = asyncio.run(scenario())
+    
+    assert len(calls) == 1
+    assert leader == follower == "The answer"
+    assert service.coalesced_requests == 1
+    assert service._answer_inflight == {}
+
+
+def test_followers_get_an_error_result_when_the_leader_raises():
+    async def scenario():
+        service = make_service()
+        release = asyncio.Event()
+        calls = stub_backends(service, release, fail=True)
+        
+        results = asyncio.gather(
+            service.retrieve_answer("What is the term?"),
+            service.retrieve_answer("What is the term?")
+        )
+        await asyncio.sleep(0)
+        release.set()
+        return calls, await results, service
+    
+    calls, results, service = asyncio.run(scenario())
+    
+    assert len(calls) == 1
+    assert all("search backend down" in result.answer for result in results)
+    assert service.coalesced_requests == 0
+    assert service._answer_inflight == {}
+
+
+def test_follower_takes_over_when_the_leader_is_cancelled():
+    async def scenario():
+        service = make_service()
+        release = asyncio.Event()
+        calls = stub_backends(service, release)
+        
+        leader = asyncio.create_task(collect(service.retrieve_answer_stream("What is the term?")))
+        follower = asyncio.create_task(collect(service.retrieve_answer_stream("What is the term?")))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return calls, await follower, service
+    
+    calls, follower, service = asyncio.run(scenario())
+    
+    assert len(calls) == 2
+    assert follower == "The answer"
+    assert service.coalesced_requests == 0
+    assert service._answer_inflight == {}
+
+
+def test_update_config_rebuilds_response_cache_when_its_limits_change():
+    service = make_service()
+    service.response_cache.insert([1.0, 0.0], "key", "answer")
+    
+    service.update_config(replace(service.config, response_cache_size=8, response_cache_ttl=60))
+    
+    assert service.response_cache.max_entries == 8
+    assert service.response_cache.ttl_seconds == 60
+    assert service.response_cache.get_stats()["entries"] == 0
+
+
+def test_update_config_clears_response_cache_when_its_limits_are_unchanged():
+    service = make_service()
+    cache = service.response_cache
+    cache.insert([1.0, 0.0], "key", "answer")
+    
+    service.update_config(replace(service.config, enable_response_cache=True, vector_weight=0.5))
+    
+    assert service.response_cache is cache
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_unique_document_ids():
+    assert RetrievalService._unique_document_ids(None) is None
+    assert RetrievalService._unique_document_ids([]) is None
+    assert RetrievalService._unique_document_ids(["b", "a", "b"]) == ["b", "a"]
+
+
+def test_document_filters_use_exact_match_for_a_lone_id():
+    ids = RetrievalService._unique_document_ids(["a", "a"])
+    
+    assert RetrievalService._document_filters(ids) == {"document_id": "a"}
+    assert RetrievalService._document_filters(["a", "b"]) == {"document_id": {"$in": ["a", "b"]}}
+
+
+def count_words(text, model):
+    return len(text.split())
+
+
+def chunk(result_id, words):
+    return SearchResult(id=result_id, content=" ".join([result_id] * words), metadata={})
+
+
+def test_prepare_context_stops_at_the_token_budget(monkeypatch):
+    monkeypatch.setattr(retrieval_service, "_count_tokens", count_words)
+    service = make_service(max_context_tokens=30)
+    
+    # Each chunk costs its word count plus the per-chunk overhead
+    context = service._prepare_context([chunk("a", 10), chunk("b", 10), chunk("c", 1)])
+    
+    assert context.startswith("[1] a")
+    assert "[2] b" in context
+    assert "[3]" not in context
+
+
+def test_prepare_context_always_keeps_the_top_chunk(monkeypatch):
+    monkeypatch.setattr(retrieval_service, "_count_tokens", count_words)
+    service = make_service(max_context_tokens=5)
+    
+    context = service._prepare_context([chunk("a", 50), chunk("b", 1)])
+    
+    assert context == "[1] " + " ".join(["a"] * 50)
+
+
+def test_token_counting_falls_back_with_a_warning(monkeypatch, caplog):
+    monkeypatch.setattr(retrieval_service, "TIKTOKEN_AVAILABLE", False)
+    retrieval_service._get_token_encoder.cache_clear()
+    retrieval_service._count_tokens.cache_clear()
+    try:
+        with caplog.at_level(logging.WARNING, logger=retrieval_service.__name__):
+            assert retrieval_service._count_tokens("a" * 40, "gpt-4o-mini") == 11
+        assert "approximating prompt tokens" in caplog.text
+    finally:
+        retrieval_service._get_token_encoder.cache_clear()
+        retrieval_service._count_tokens.cache_clear()
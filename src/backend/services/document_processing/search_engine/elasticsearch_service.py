@@ -1,6 +1,7 @@
 import logging
 import os
 import asyncio
+import time
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from elasticsearch import AsyncElasticsearch
@@ -15,6 +16,9 @@ class ElasticsearchConfig:
     port: int = int(os.getenv("ELASTICSEARCH_PORT", "9200"))
     index_name: str = "legal_documents"
     timeout: int = 30
+    bulk_refresh: str = "wait_for"
+    http_compress: bool = os.getenv("ELASTICSEARCH_HTTP_COMPRESS", "false").lower() in ("1", "true", "yes")
+    health_check_interval: float = 30.0
 
 
 class ElasticsearchService:
@@ -24,11 +28,14 @@ class ElasticsearchService:
         
         self.client = AsyncElasticsearch(
             hosts=[f"http://{self.config.host}:{self.config.port}"],
-            timeout=self.config.timeout
+            timeout=self.config.timeout,
+            http_compress=self.config.http_compress
         )
         
         self._index_initialized = False
         self._init_lock = asyncio.Lock()
+        self._last_health: Optional[bool] = None
+        self._last_health_at = 0.0
     
     async def _create_index(self):
         """Create index if it doesn't exist (thread-safe)"""
@@ -108,7 +115,7 @@ class ElasticsearchService:
                 docs.append(doc)
             
             from elasticsearch.helpers import async_bulk
-            success, failed = await async_bulk(self.client, docs, refresh=True)
+            success, failed = await async_bulk(self.client, docs, refresh=self.config.bulk_refresh)
             
             self.logger.info(f"Indexed {success} chunks successfully")
             if failed:
@@ -286,12 +293,20 @@ class ElasticsearchService:
             return {}
 
     async def health_check(self) -> bool:
-        """Check Elasticsearch health asynchronously"""
+        """Check Elasticsearch health, reusing the last probe within the check interval"""
+        now = time.monotonic()
+        if self._last_health is not None and now - self._last_health_at < self.config.health_check_interval:
+            return self._last_health
+        
         try:
             health = await self.client.cluster.health()
-            return health["status"] in ["green", "yellow"]
+            healthy = health["status"] in ["green", "yellow"]
         except Exception:
-            return False
+            healthy = False
+        
+        self._last_health = healthy
+        self._last_health_at = now
+        return healthy
 
     def index_chunks_sync(self, chunks: List[DocumentChunk]) -> bool:
         """Sync wrapper for backward compatibility"""
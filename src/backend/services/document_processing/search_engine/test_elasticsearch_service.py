@@ -0,0 +1,59 @@
+import asyncio
+
+from services.document_processing.search_engine import elasticsearch_service
+from services.document_processing.search_engine.elasticsearch_service import (
+    ElasticsearchConfig, ElasticsearchService
+)
+
+
+class FakeCluster:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+    
+    async def health(self):
+        self.calls += 1
+        status = self.statuses.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return {"status": status}
+
+
+class FakeClient:
+    def __init__(self, statuses):
+        self.cluster = FakeCluster(statuses)
+
+
+def make_service(monkeypatch, statuses, **config):
+    now = [1000.0]
+    monkeypatch.setattr(elasticsearch_service.time, "monotonic", lambda: now[0])
+    # Skip __init__ so tests need no Elasticsearch cluster
+    service = ElasticsearchService.__new__(ElasticsearchService)
+    service.config = ElasticsearchConfig(**config)
+    service.client = FakeClient(statuses)
+    service._last_health = None
+    service._last_health_at = 0.0
+    return service, now
+
+
+def test_health_check_reuses_result_within_interval(monkeypatch):
+    service, now = make_service(monkeypatch, ["green", "red"], health_check_interval=30)
+    
+    assert asyncio.run(service.health_check()) is True
+    now[0] += 29
+    assert asyncio.run(service.health_check()) is True
+    assert service.client.cluster.calls == 1
+    
+    now[0] += 2
+    assert asyncio.run(service.health_check()) is False
+    assert service.client.cluster.calls == 2
+
+
+def test_health_check_caches_failed_probes(monkeypatch):
+    service, now = make_service(monkeypatch, [ConnectionError("down"), "yellow"], health_check_interval=30)
+    
+    assert asyncio.run(service.health_check()) is False
+    assert asyncio.run(service.health_check()) is False
+    now[0] += 30
+    assert asyncio.run(service.health_check()) is True
+    assert service.client.cluster.calls == 2
@@ -2,34 +2,39 @@
 Simple text file extraction.
 """
 
+import io
 from pathlib import Path
 import chardet
 import aiofiles
-import asyncio
 from .base import TextExtractor, ExtractionResult
 
 class PlainTextExtractor(TextExtractor):
     
     def extract(self, file_path: Path) -> ExtractionResult:
-        return asyncio.run(self.extract_async(file_path))
+        try:
+            return self._decode(file_path.read_bytes())
+        except Exception as e:
+            return ExtractionResult("", error=f"Text extraction failed: {e}")
     
     async def extract_async(self, file_path: Path) -> ExtractionResult:
         try:
             async with aiofiles.open(file_path, 'rb') as file:
                 raw = await file.read()
-                encoding = chardet.detect(raw)['encoding'] or 'utf-8'
-            
-            async with aiofiles.open(file_path, 'r', encoding=encoding, errors='replace') as file:
-                text = await file.read()
-            
-            return ExtractionResult(
-                text=text,
-                metadata={
-                    "encoding": encoding,
-                    "size": len(text),
-                    "method": "chardet"
-                }
-            )
-            
+            return self._decode(raw)
         except Exception as e:
-            return ExtractionResult("", error=f"Text extraction failed: {e}") 
\ No newline at end of file
+            return ExtractionResult("", error=f"Text extraction failed: {e}")
+    
+    @staticmethod
+    def _decode(raw: bytes) -> ExtractionResult:
+        encoding = chardet.detect(raw)['encoding'] or 'utf-8'
+        # The StringIO round-trip applies universal newlines, matching a text-mode read
+        text = io.StringIO(raw.decode(encoding, errors='replace'), newline=None).read()
+        
+        return ExtractionResult(
+            text=text,
+            metadata={
+                "encoding": encoding,
+                "size": len(text),
+                "method": "chardet"
+            }
+        )
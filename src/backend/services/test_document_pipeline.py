@@ -0,0 +1,98 @@
+import asyncio
+import logging
+
+from services.document_pipeline import DocumentPipeline, PipelineConfig
+
+
+class FakeEmbeddingService:
+    def __init__(self, fail_after=None, hang_after=None):
+        self.fail_after = fail_after
+        self.hang_after = hang_after
+    
+    async def iter_embedded_chunks(self, chunks, batch_size):
+        for batch_number, start in enumerate(range(0, len(chunks), batch_size)):
+            if batch_number == self.fail_after:
+                raise RuntimeError("embedding API down")
+            if batch_number == self.hang_after:
+                await asyncio.Event().wait()
+            yield [{"chunk": chunk} for chunk in chunks[start:start + batch_size]]
+
+
+class FakeVectorStorage:
+    def __init__(self, fail_batch=None, block=False):
+        self.fail_batch = fail_batch
+        self.block = block
+        self.stored = []
+        self.cancelled = False
+        self.deleted = []
+    
+    async def store_embeddings(self, embedded_batch):
+        batch_number = len(self.stored)
+        self.stored.append(embedded_batch)
+        if self.block:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return batch_number != self.fail_batch
+    
+    async def delete_document(self, document_id):
+        self.deleted.append(document_id)
+        return True
+
+
+def make_pipeline(embedding_service, vector_storage):
+    # Skip __init__ so tests need no OpenAI key, Chroma or Elasticsearch
+    pipeline = DocumentPipeline.__new__(DocumentPipeline)
+    pipeline.config = PipelineConfig(batch_size=2)
+    pipeline.logger = logging.getLogger(__name__)
+    pipeline.embedding_service = embedding_service
+    pipeline.vector_storage = vector_storage
+    return pipeline
+
+
+CHUNKS = [{"chunk": f"chunk {i}"} for i in range(5)]
+
+
+def test_embed_and_store_stores_every_batch():
+    storage = FakeVectorStorage()
+    pipeline = make_pipeline(FakeEmbeddingService(), storage)
+    
+    assert asyncio.run(pipeline._embed_and_store(CHUNKS, "doc")) is True
+    assert [len(batch) for batch in storage.stored] == [2, 2, 1]
+    assert storage.deleted == []
+
+
+def test_embed_and_store_removes_partial_vectors_when_a_batch_fails():
+    storage = FakeVectorStorage(fail_batch=1)
+    pipeline = make_pipeline(FakeEmbeddingService(), storage)
+    
+    assert asyncio.run(pipeline._embed_and_store(CHUNKS, "doc")) is False
+    assert storage.deleted == ["doc"]
+
+
+def test_embed_and_store_removes_partial_vectors_when_embedding_fails():
+    storage = FakeVectorStorage()
+    pipeline = make_pipeline(FakeEmbeddingService(fail_after=2), storage)
+    
+    assert asyncio.run(pipeline._embed_and_store(CHUNKS, "doc")) is False
+    assert storage.stored
+    assert storage.deleted == ["doc"]
+
+
+def test_cancelling_embed_and_store_cancels_the_pending_store():
+    async def scenario():
+        storage = FakeVectorStorage(block=True)
+        pipeline = make_pipeline(FakeEmbeddingService(hang_after=1), storage)
+        task = asyncio.create_task(pipeline._embed_and_store(CHUNKS, "doc"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return task, storage
+    
+    task, storage = asyncio.run(scenario())
+    
+    assert task.cancelled()
+    assert storage.cancelled
+    assert storage.deleted == ["doc"]
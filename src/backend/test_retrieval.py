@@ -11,8 +11,6 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.document_processing.retrieval.query_processor import QueryProcessor
-from services.document_processing.retrieval.hybrid_retriever import HybridRetriever, HybridSearchConfig
-from services.document_processing.retrieval.answer_generator import AnswerGenerator
 from services.document_processing.retrieval.retrieval_service import RetrievalService
 from services.document_processing.embedding.vector_storage_service import VectorStorageService
 from services.document_processing.search_engine.elasticsearch_service import ElasticsearchService
@@ -20,6 +18,9 @@ from services.document_processing.search_engine.elasticsearch_service import Ela
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Needs live ChromaDB and Elasticsearch, so it runs as a script rather than under pytest
+__test__ = False
+
 async def test_query_processor():
     """Test the query processor functionality."""
     logger.info("Testing Query Processor...")
@@ -36,12 +37,10 @@ async def test_query_processor():
     
     for query in test_queries:
         try:
-            processed = await processor.process_query(query)
+            processed = processor.process_query(query)
             logger.info(f"Query: {query}")
             logger.info(f"  Intent: {processed.intent.value}")
-            logger.info(f"  Legal concepts: {processed.legal_concepts}")
-            logger.info(f"  Entities: {processed.entities}")
-            logger.info(f"  Confidence: {processed.confidence}")
+            logger.info(f"  Keywords: {processed.keywords}")
             logger.info("---")
         except Exception as e:
             logger.error(f"Query processing failed for '{query}': {e}")
@@ -60,18 +59,6 @@ async def test_services_initialization():
         query_processor = QueryProcessor()
         logger.info("✅ QueryProcessor initialized")
         
-        hybrid_config = HybridSearchConfig()
-        hybrid_retriever = HybridRetriever(
-            vector_service=vector_service,
-            elasticsearch_service=elasticsearch_service,
-            query_processor=query_processor,
-            config=hybrid_config
-        )
-        logger.info("✅ HybridRetriever initialized")
-        
-        answer_generator = AnswerGenerator()
-        logger.info("✅ AnswerGenerator initialized")
-        
         retrieval_service = RetrievalService(
             vector_service=vector_service,
             elasticsearch_service=elasticsearch_service
@@ -123,8 +110,8 @@ async def test_mock_retrieval():
             
             if search_results:
                 logger.info("Sample search result:")
-                logger.info(f"  Content: {search_results[0]['content'][:100]}...")
-                logger.info(f"  Score: {search_results[0]['score']}")
+                logger.info(f"  Content: {search_results[0].content[:100]}...")
+                logger.info(f"  Score: {search_results[0].score}")
         except Exception as e:
             logger.warning(f"Search test failed: {e}")
         
@@ -132,7 +119,7 @@ async def test_mock_retrieval():
             retrieval_result = await retrieval_service.retrieve_answer(query=test_query)
             logger.info(f"Retrieval completed:")
             logger.info(f"  Answer: {retrieval_result.answer[:200]}...")
-            logger.info(f"  Confidence: {retrieval_result.confidence}")
+            logger.info(f"  Intent: {retrieval_result.query_intent}")
             logger.info(f"  Sources used: {retrieval_result.sources_used}")
             logger.info(f"  Processing time: {retrieval_result.processing_time:.2f}s")
         except Exception as e: